@@ -0,0 +1,407 @@
+"""
+Latency benchmark for Find in Files "Where:" completions
+
+Runs `FindInFilesLocationCompletionListener.on_query_completions` and
+`FindInFilesCommitLocationCompletionCommand` outside of Sublime Text against
+stubbed `sublime` and `sublime_plugin` modules and synthetic directory trees.
+
+Each scenario simulates typing a path character by character and reports
+p50/p99 latency, peak traced memory and the number of memory blocks
+allocated and not yet freed per keystroke.
+
+Usage:
+
+    python benchmarks/location_completions.py [--sizes 10 1000 100000] [--repeat 5]
+"""
+from __future__ import annotations
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from time import perf_counter
+from types import ModuleType
+import argparse
+import enum
+import importlib
+import os
+import re
+import statistics
+import sys
+import threading
+import tracemalloc
+
+PACKAGE_PATH = Path(__file__).resolve().parent.parent
+PACKAGE_NAME = "sublime_default_extended"
+# exclude memory allocated by taking snapshots
+TRACEMALLOC_FILTERS = [tracemalloc.Filter(False, tracemalloc.__file__)]
+
+
+# stubs
+
+def stub_sublime() -> ModuleType:
+    """
+    Create a `sublime` module providing the API used by location completions.
+    """
+    sublime = ModuleType("sublime")
+
+    class KindId(enum.IntEnum):
+        AMBIGUOUS = 0
+        KEYWORD = 1
+        TYPE = 2
+        NAMESPACE = 5
+        VARIABLE = 7
+
+    class AutoCompleteFlags(enum.IntFlag):
+        NONE = 0
+        INHIBIT_WORD_COMPLETIONS = 8
+        INHIBIT_EXPLICIT_COMPLETIONS = 16
+        DYNAMIC_COMPLETIONS = 32
+
+    class Region:
+        __slots__ = ["a", "b"]
+
+        def __init__(self, a, b=None):
+            self.a = a
+            self.b = a if b is None else b
+
+        def __contains__(self, pt):
+            return self.begin() <= pt <= self.end()
+
+        def begin(self):
+            return min(self.a, self.b)
+
+        def end(self):
+            return max(self.a, self.b)
+
+    class CompletionItem:
+        __slots__ = ["trigger", "annotation", "completion", "completion_format", "kind", "details"]
+
+        def __init__(self, trigger, annotation="", completion="", completion_format=0,
+                     kind=(KindId.AMBIGUOUS, "", ""), details=""):
+            self.trigger = trigger
+            self.annotation = annotation
+            self.completion = completion
+            self.completion_format = completion_format
+            self.kind = kind
+            self.details = details
+
+    class CompletionList:
+        def __init__(self, completions=None, flags=0):
+            self.completions = completions
+            self.flags = flags
+            self.ready = threading.Event()
+            if completions is not None:
+                self.ready.set()
+
+        def set_completions(self, completions, flags=0):
+            self.completions = completions
+            self.flags = flags
+            self.ready.set()
+
+    class Settings(dict):
+        def set(self, key, value):
+            self[key] = value
+
+        def add_on_change(self, tag, callback):
+            pass
+
+        def clear_on_change(self, tag):
+            pass
+
+    def set_timeout(callback, delay=0):
+        timer = threading.Timer(delay / 1000.0, callback)
+        timer.daemon = True
+        timer.start()
+
+    def format_command(cmd, args=None):
+        return f"{cmd} {args!r}"
+
+    sublime.KindId = KindId
+    sublime.KIND_AMBIGUOUS = (KindId.AMBIGUOUS, "", "")
+    sublime.KIND_VARIABLE = (KindId.VARIABLE, "v", "Variable")
+    sublime.KIND_ID_KEYWORD = KindId.KEYWORD
+    sublime.AutoCompleteFlags = AutoCompleteFlags
+    sublime.COMPLETION_FORMAT_COMMAND = 2
+    sublime.Region = Region
+    sublime.CompletionItem = CompletionItem
+    sublime.CompletionList = CompletionList
+    sublime.Settings = Settings
+    sublime.format_command = format_command
+    sublime.set_timeout = set_timeout
+    sublime.set_timeout_async = set_timeout
+    sublime.platform = lambda: "windows" if os.name == "nt" else "linux"
+    sublime.load_settings = lambda name: Settings()
+    sublime.save_settings = lambda name: None
+    sublime.status_message = lambda msg: None
+    sublime.windows = lambda: []
+    sublime.active_window = lambda: None
+    return sublime
+
+
+def stub_sublime_plugin() -> ModuleType:
+    sublime_plugin = ModuleType("sublime_plugin")
+
+    class EventListener:
+        pass
+
+    class ViewEventListener:
+        def __init__(self, view):
+            self.view = view
+
+    class TextCommand:
+        def __init__(self, view):
+            self.view = view
+
+    class WindowCommand:
+        def __init__(self, window):
+            self.window = window
+
+    class TextChangeListener:
+        pass
+
+    class CommandInputHandler:
+        pass
+
+    class ListInputHandler(CommandInputHandler):
+        pass
+
+    class TextInputHandler(CommandInputHandler):
+        pass
+
+    for cls in (
+        EventListener, ViewEventListener, TextCommand, WindowCommand, TextChangeListener,
+        CommandInputHandler, ListInputHandler, TextInputHandler,
+    ):
+        setattr(sublime_plugin, cls.__name__, cls)
+    return sublime_plugin
+
+
+class StubWindow:
+    def __init__(self, folders):
+        self._folders = [str(folder) for folder in folders]
+
+    def id(self):
+        return 1
+
+    def folders(self):
+        return self._folders
+
+    def views(self):
+        return []
+
+    def active_view(self):
+        return None
+
+
+class StubView:
+    """
+    A view emulating the "Where:" input widget containing a single path pattern.
+    """
+
+    def __init__(self, sublime, window, settings):
+        self.sublime = sublime
+        self._window = window
+        self._settings = sublime.Settings(settings)
+        self.text = ""
+        self.selection = [sublime.Region(0)]
+
+    def element(self):
+        return "find_in_files:input:location"
+
+    def settings(self):
+        return self._settings
+
+    def window(self):
+        return self._window
+
+    def sel(self):
+        return self.selection
+
+    def size(self):
+        return len(self.text)
+
+    def substr(self, x):
+        if isinstance(x, int):
+            return self.text[x:x + 1]
+        return self.text[x.begin():x.end()]
+
+    def match_selector(self, pt, selector):
+        is_path = "/" in self.text or "\\" in self.text
+        if selector == "source.file-pattern":
+            return True
+        if selector == "- meta.path":
+            return not is_path
+        if selector.startswith("meta.path"):
+            return is_path
+        return True
+
+    def expand_to_scope(self, pt, selector):
+        return self.sublime.Region(0, len(self.text))
+
+    def find_all(self, pattern):
+        return [self.sublime.Region(*m.span()) for m in re.finditer(pattern, self.text)]
+
+    def insert(self, edit, pt, text):
+        self.text = self.text[:pt] + text + self.text[pt:]
+        self.selection = [self.sublime.Region(pt + len(text))]
+
+    def erase(self, edit, region):
+        self.text = self.text[:region.begin()] + self.text[region.end():]
+
+    def replace(self, edit, region, text):
+        self.erase(edit, region)
+        self.insert(edit, region.begin(), text)
+
+    def run_command(self, cmd, args=None):
+        pass
+
+
+def load_package():
+    sys.modules["sublime"] = sublime = stub_sublime()
+    sys.modules["sublime_plugin"] = stub_sublime_plugin()
+
+    package = ModuleType(PACKAGE_NAME)
+    package.__path__ = [str(PACKAGE_PATH)]
+    sys.modules[PACKAGE_NAME] = package
+    module = importlib.import_module(f"{PACKAGE_NAME}.location_widget_completions")
+    index = importlib.import_module(f"{PACKAGE_NAME}.project_index")
+    return sublime, module, index
+
+
+# benchmark
+
+def make_tree(root: Path, size: int) -> str:
+    """
+    Create `size` directories below `root` and return the name of their parent.
+    """
+    parent = root / "entries"
+    parent.mkdir()
+    for i in range(size):
+        (parent / f"dir_{i:06d}").mkdir()
+    return parent.name
+
+
+def percentile(samples, pct):
+    samples = sorted(samples)
+    idx = min(len(samples) - 1, max(0, round(pct / 100.0 * len(samples)) - 1))
+    return samples[idx]
+
+
+def measure(step, keystrokes, repeat, setup=None):
+    """
+    Run `step` for each keystroke.
+
+    :returns: A tuple of latencies in ms, peak traced memory in bytes
+              and numbers of new memory blocks, still allocated after each step.
+    """
+    latencies = []
+    peaks = []
+    blocks = []
+    for _ in range(repeat):
+        for text in keystrokes:
+            if setup:
+                setup()
+            start = perf_counter()
+            step(text)
+            latencies.append((perf_counter() - start) * 1000.0)
+
+    for text in keystrokes:
+        if setup:
+            setup()
+        tracemalloc.start()
+        step(text)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        peaks.append(peak)
+
+        if setup:
+            setup()
+        tracemalloc.start()
+        before = tracemalloc.take_snapshot().filter_traces(TRACEMALLOC_FILTERS)
+        step(text)
+        after = tracemalloc.take_snapshot().filter_traces(TRACEMALLOC_FILTERS)
+        tracemalloc.stop()
+        stats = after.compare_to(before, "filename")
+        blocks.append(sum(stat.count_diff for stat in stats if stat.count_diff > 0))
+
+    return latencies, peaks, blocks
+
+
+def report(name, size, latencies, peaks, blocks):
+    print(
+        f"{name:<20} {size:>8} "
+        f"{statistics.median(latencies):>10.3f} {percentile(latencies, 99):>10.3f} "
+        f"{statistics.median(peaks) / 1024.0:>11.1f} {statistics.median(blocks):>10.0f}"
+    )
+
+
+def run(sizes, repeat):
+    sublime, module, index_module = load_package()
+    listener = module.FindInFilesLocationCompletionListener()
+
+    print(
+        f"{'scenario':<20} {'entries':>8} {'p50 [ms]':>10} {'p99 [ms]':>10} "
+        f"{'peak [KiB]':>11} {'new blocks':>10}"
+    )
+
+    for size in sizes:
+        with TemporaryDirectory() as tmp:
+            root = Path(tmp)
+            parent = make_tree(root, size)
+            window = StubWindow([root])
+
+            def query(text, view):
+                view.text = text
+                pt = len(text)
+                view.selection = [sublime.Region(pt)]
+                result = listener.on_query_completions(view, "", [pt])
+                if result is not None:
+                    result.ready.wait(10.0)
+                return result
+
+            def clear_caches():
+                module.directory_cache.clear()
+                module.rank_cache.clear()
+
+            # absolute paths, listed by directory scanner
+            absolute = f"{root.as_posix()}/{parent}/dir_00"
+            keystrokes = [absolute[:i] for i in range(len(absolute) - 6, len(absolute) + 1)]
+            for mode in ("sync", "async"):
+                view = StubView(sublime, window, {"location_completions_async": mode == "async"})
+                report(
+                    f"scan cold {mode}", size,
+                    *measure(lambda t: query(t, view), keystrokes, repeat, clear_caches)
+                )
+                report(
+                    f"scan warm {mode}", size,
+                    *measure(lambda t: query(t, view), keystrokes, repeat)
+                )
+
+            # project relative paths, resolved by project index
+            index = index_module.project_index(window)
+            index.thread.join()
+            relative = f"//{parent}/dir_00"
+            keystrokes = [relative[:i] for i in range(len(relative) - 6, len(relative) + 1)]
+            view = StubView(sublime, window, {})
+            report("project index", size, *measure(lambda t: query(t, view), keystrokes, repeat))
+            index_module.discard_indexes(window.id())
+
+            # committing a completion
+            command = module.FindInFilesCommitLocationCompletionCommand(view)
+
+            def commit(text):
+                view.text = text
+                view.selection = [sublime.Region(len(text))]
+                command.run(None, module.LocationCompletionType.PATH, "dir_000001")
+
+            report("commit path", size, *measure(commit, [relative], repeat * 10))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 1000, 100000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    run(args.sizes, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,314 @@
+from __future__ import annotations
 from functools import partial, wraps
-from time import time as now
+from heapq import heappop, heappush
+from itertools import count
+from math import ceil
+from threading import RLock
+from time import monotonic
+from typing import Callable, Hashable
+from weakref import WeakKeyDictionary, WeakSet
+import traceback
 
 import sublime
 import sublime_plugin
 
+__all__ = ["DebounceCleanupListener"]
 
-def debounced(delay_in_ms, sync=False):
+# granularity of the scheduler's timer in ms
+TICK = 10
+# weight of the latest measured callback cost in its moving average
+COST_SMOOTHING = 0.3
+# ratio of adaptive delay to average callback cost
+COST_FACTOR = 10
+
+LEADING = "leading"
+THROTTLE = "throttle"
+TRAILING = "trailing"
+
+
+def now() -> float:
+    return monotonic() * 1000
+
+
+class Call:
+    """
+    This class describes the pending call of a debounced function for one key.
+
+    `deadline` may be moved at any time without touching the scheduler's heap.
+    The heap entry is re-scheduled lazily, when it expires too early.
+    """
+
+    __slots__ = ["debouncer", "key", "callback", "deadline", "scheduled", "batch"]
+
+    def __init__(self, debouncer: Debouncer, key: Hashable):
+        self.debouncer = debouncer
+        self.key = key
+        self.callback: Callable | None = None
+        self.deadline = 0.0
+        self.scheduled: float | None = None
+        self.batch: list | None = None
+
+
+class Scheduler:
+    """
+    This class describes a scheduler owning deadlines of all debounced calls.
+
+    Deadlines are kept in a heap. Only one timer is armed at a time, for the
+    earliest deadline rounded up to the next `TICK`, so calls expiring close
+    to each other are handled by a single wake-up.
+    """
+
+    def __init__(self, set_timeout: Callable[[Callable, float], None]):
+        self.set_timeout = set_timeout
+        self.heap: list[tuple[float, int, Call]] = []
+        self.counter = count()
+        self.armed_at: float | None = None
+        self.lock = RLock()
+
+    def schedule(self, call: Call, deadline: float) -> None:
+        with self.lock:
+            call.deadline = deadline
+            if call.scheduled is None or deadline < call.scheduled:
+                call.scheduled = deadline
+                heappush(self.heap, (deadline, next(self.counter), call))
+                self.arm()
+
+    def arm(self) -> None:
+        if not self.heap:
+            return
+
+        deadline = self.heap[0][0]
+        if self.armed_at is not None and self.armed_at <= deadline + TICK:
+            return
+
+        delay = ceil(max(0.0, deadline - now()) / TICK) * TICK
+        armed_at = self.armed_at = now() + delay
+        self.set_timeout(partial(self.run, armed_at), delay)
+
+    def run(self, armed_at: float) -> None:
+        callbacks = []
+        with self.lock:
+            if self.armed_at == armed_at:
+                self.armed_at = None
+
+            due = now() + TICK / 2
+            while self.heap and self.heap[0][0] <= due:
+                deadline, _, call = heappop(self.heap)
+                if call.scheduled != deadline:
+                    # superseded by an earlier heap entry
+                    continue
+                if call.deadline > due:
+                    # deadline moved since scheduled
+                    call.scheduled = call.deadline
+                    heappush(self.heap, (call.deadline, next(self.counter), call))
+                    continue
+                call.scheduled = None
+                callback = call.debouncer.expire(call)
+                if callback:
+                    callbacks.append(callback)
+
+            self.arm()
+
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception:
+                traceback.print_exc()
+
+
+sync_scheduler = Scheduler(sublime.set_timeout)
+async_scheduler = Scheduler(sublime.set_timeout_async)
+
+
+# all debouncers, to drop pending calls of closed views and windows
+debouncers: WeakSet[Debouncer] = WeakSet()
+
+
+class Debouncer:
+    """
+    This class describes the state of a debounced function.
+
+    Modes:
+
+    - ``trailing``: call function with latest arguments, once calls stopped
+      for `delay` ms.
+    - ``leading``: call function immediately, suppress all further calls
+      until calls stopped for `delay` ms.
+    - ``throttle``: call function immediately and at most once per `delay` ms
+      afterwards, with latest arguments.
+
+    If `max_delay` is given, the delay adapts to the exponentially weighted
+    moving average of the time callbacks took per key, scaled by
+    `COST_FACTOR` and limited to the range of `delay` to `max_delay`.
+    """
+
+    def __init__(
+        self,
+        delay: float,
+        scheduler: Scheduler,
+        mode: str = TRAILING,
+        max_delay: float | None = None,
+    ):
+        if mode not in (LEADING, THROTTLE, TRAILING):
+            raise ValueError(f"Invalid debounce mode: {mode}")
+
+        self.delay = delay
+        self.max_delay = max_delay
+        self.scheduler = scheduler
+        self.mode = mode
+        self.calls: dict[Hashable, Call] = {}
+        self.costs: dict[Hashable, float] = {}
+        debouncers.add(self)
+
+    def delay_for(self, key: Hashable) -> float:
+        if self.max_delay is None:
+            return self.delay
+
+        cost = self.costs.get(key)
+        if cost is None:
+            return self.delay
+        return min(self.max_delay, max(self.delay, cost * COST_FACTOR))
+
+    def measured(self, key: Hashable, callback: Callable) -> Callable:
+        """
+        Return a wrapper of `callback`, which updates average cost of `key`.
+        """
+
+        def run(*args, **kwargs):
+            start = now()
+            try:
+                callback(*args, **kwargs)
+            finally:
+                cost = now() - start
+                with self.scheduler.lock:
+                    average = self.costs.get(key)
+                    if average is not None:
+                        cost = average + COST_SMOOTHING * (cost - average)
+                    self.costs[key] = cost
+
+        return run
+
+    def request(self, key: Hashable, callback: Callable) -> None:
+        with self.scheduler.lock:
+            call = self.calls.get(key)
+            if call is None:
+                call = self.calls[key] = Call(self, key)
+                call.callback = callback
+                if self.mode == TRAILING:
+                    self.scheduler.schedule(call, now() + self.delay_for(key))
+                else:
+                    self.scheduler.schedule(call, now())
+
+            elif self.mode == TRAILING:
+                call.callback = callback
+                call.deadline = now() + self.delay_for(key)
+
+            elif self.mode == LEADING:
+                if call.callback is None:
+                    call.deadline = now() + self.delay_for(key)
+
+            else:
+                call.callback = callback
+
+    def expire(self, call: Call) -> Callable | None:
+        """
+        Handle a call, whose deadline is reached and return the callback to run.
+        """
+        if self.calls.get(call.key) is not call:
+            # cancelled
+            return None
+
+        callback, call.callback = call.callback, None
+        if callback is None or not is_valid(call.key):
+            del self.calls[call.key]
+            return None
+
+        if self.mode == TRAILING:
+            del self.calls[call.key]
+        else:
+            # suppress further calls for a while
+            self.scheduler.schedule(call, now() + self.delay_for(call.key))
+
+        if self.max_delay is not None:
+            return self.measured(call.key, callback)
+        return callback
+
+    def cancel(self, key: Hashable) -> None:
+        """
+        Drop a pending call without running it.
+        """
+        with self.scheduler.lock:
+            self.calls.pop(key, None)
+
+    def forget(self, key: Hashable) -> None:
+        """
+        Drop all state of a key, like a closed view.
+        """
+        with self.scheduler.lock:
+            self.calls.pop(key, None)
+            self.costs.pop(key, None)
+
+    def flush(self, key: Hashable) -> None:
+        """
+        Run a pending call immediately.
+        """
+        with self.scheduler.lock:
+            call = self.calls.get(key)
+            callback = self.expire(call) if call else None
+        if callback:
+            callback()
+
+
+class Batcher(Debouncer):
+    """
+    This class describes the state of a batched function.
+
+    It collects an item per call and passes them as `batch` keyword argument
+    to the callback of the latest call.
+    """
+
+    def __init__(
+        self,
+        delay: float,
+        scheduler: Scheduler,
+        merge: Callable | None = None,
+        max_delay: float | None = None,
+    ):
+        super().__init__(delay, scheduler, TRAILING, max_delay)
+        self.merge = merge
+
+    def request(self, key: Hashable, callback: Callable, item=None) -> None:
+        with self.scheduler.lock:
+            super().request(key, callback)
+            call = self.calls[key]
+            if call.batch is None:
+                call.batch = []
+            call.batch.append(item)
+
+    def expire(self, call: Call) -> Callable | None:
+        callback = super().expire(call)
+        if callback is None:
+            return None
+
+        batch, call.batch = call.batch, None
+        if self.merge:
+            # merge when running the callback, to not block the scheduler
+            return lambda: callback(batch=self.merge(batch))
+        return partial(callback, batch=batch)
+
+
+def is_valid(key: Hashable) -> bool:
+    validate = getattr(key, "is_valid", None)
+    return validate() if validate else True
+
+
+def view_key(self, *args, **kwargs) -> sublime.View:
+    return self.view if hasattr(self, 'view') else args[0]
+
+
+def debounced(
+    delay_in_ms, sync=False, mode=TRAILING, key=view_key, per_instance=False, max_delay_in_ms=None
+):
     """Delay calls to event hooks until they weren't triggered for n ms.
 
     Performs view-specific tracking and is best suited for the
@@ -16,41 +319,174 @@ def debounced(delay_in_ms, sync=False):
 
     Calls are only made when the `view` is still "valid" according to ST's API,
     so it's not necessary to check it in the wrapped function.
+
+    The `mode` controls which calls are made, see `Debouncer`.
+    Pending calls of a view can be dropped via ``wrapper.cancel(view)``
+    or made immediately via ``wrapper.flush(view)``.
+
+    Calls are tracked for the object returned by ``key(self, *args, **kwargs)``,
+    which may be a `sublime.View`, a `sublime.Window` or any hashable value.
+    Pending calls of closed views and windows are dropped automatically.
+
+    With `per_instance`, each instance of the decorated method's class tracks
+    its own calls, instead of sharing them with all other instances.
+
+    With `max_delay_in_ms`, the delay adapts to the time the decorated function
+    takes per key, ranging from `delay_in_ms` to `max_delay_in_ms`. Expensive
+    hooks, like those processing huge files, back off automatically, while
+    cheap ones stay responsive.
     """
 
-    # We assume that locking is not necessary because each function will be called
-    # from either the ui or the async thread only.
-    set_timeout = sublime.set_timeout if sync else sublime.set_timeout_async
+    scheduler = sync_scheduler if sync else async_scheduler
 
     def decorator(func):
-        call_at = {}
-
-        def _debounced_callback(view, callback):
-            if not view.is_valid():
-                del call_at[view.view_id]
-                return
-            diff = call_at[view.view_id] - now() * 1000
-            if diff > 0:
-                set_timeout(partial(_debounced_callback, view, callback), diff)
-            else:
-                del call_at[view.view_id]
-                callback()
+        def request(debouncer, self, args, kwargs):
+            debouncer.request(key(self, *args, **kwargs), partial(func, self, *args, **kwargs))
+
+        return debounced_wrapper(
+            func,
+            lambda: Debouncer(delay_in_ms, scheduler, mode, max_delay_in_ms),
+            request,
+            per_instance,
+        )
+
+    return decorator
+
 
-        @wraps(func)
-        def wrapper(self, *args, **kwargs):
-            view = self.view if hasattr(self, 'view') else args[0]
-            pending = view.view_id in call_at
-            call_at[view.view_id] = now() * 1000 + delay_in_ms
-            if pending:
-                return
-            callback = partial(func, self, *args, **kwargs)
-            set_timeout(partial(_debounced_callback, view, callback), delay_in_ms)
+def batched(
+    delay_in_ms,
+    sync=False,
+    key=view_key,
+    payload=None,
+    merge=None,
+    per_instance=False,
+    max_delay_in_ms=None,
+):
+    """Collect arguments of event hooks until they weren't triggered for n ms.
 
-        return wrapper
+    Other than `debounced`, which drops all but the latest call, arguments of
+    all calls are collected per key and passed to the decorated function at
+    once via its `batch` keyword argument, along with arguments of the latest
+    call.
+
+        @batched(200, payload=lambda self, view: list(view.sel()), merge=merge_regions)
+        def on_selection_modified_async(self, view, batch):
+            ...
+
+    The item collected per call is returned by ``payload(self, *args, **kwargs)``
+    and defaults to the tuple of positional arguments. The list of collected
+    items is passed to `merge`, if given, before being delivered.
+
+    See `debounced` for `key`, `per_instance` and `max_delay_in_ms` arguments.
+    """
+
+    scheduler = sync_scheduler if sync else async_scheduler
+
+    def decorator(func):
+        def request(batcher, self, args, kwargs):
+            batcher.request(
+                key(self, *args, **kwargs),
+                partial(func, self, *args, **kwargs),
+                payload(self, *args, **kwargs) if payload else args,
+            )
+
+        return debounced_wrapper(
+            func,
+            lambda: Batcher(delay_in_ms, scheduler, merge, max_delay_in_ms),
+            request,
+            per_instance,
+        )
 
     return decorator
 
 
+def debounced_wrapper(
+    func: Callable,
+    create: Callable[[], Debouncer],
+    request: Callable[[Debouncer, object, tuple, dict], None],
+    per_instance: bool,
+) -> Callable:
+    """
+    Return a wrapper for `func`, which passes calls to a debouncer.
+
+    Debouncers are created via `create`, either once or per instance.
+    """
+    if per_instance:
+        instances = WeakKeyDictionary()
+
+        def get_debouncer(self) -> Debouncer:
+            debouncer = instances.get(self)
+            if debouncer is None:
+                debouncer = instances[self] = create()
+            return debouncer
+
+        def all_debouncers() -> list[Debouncer]:
+            return list(instances.values())
+
+    else:
+        shared = create()
+
+        def get_debouncer(self) -> Debouncer:
+            return shared
+
+        def all_debouncers() -> list[Debouncer]:
+            return [shared]
+
+    @wraps(func)
+    def wrapper(self, *args, **kwargs):
+        request(get_debouncer(self), self, args, kwargs)
+
+    def cancel(owner: Hashable) -> None:
+        for debouncer in all_debouncers():
+            debouncer.cancel(owner)
+
+    def flush(owner: Hashable) -> None:
+        for debouncer in all_debouncers():
+            debouncer.flush(owner)
+
+    wrapper.cancel = cancel
+    wrapper.flush = flush
+    return wrapper
+
+
+def merge_regions(batch: list) -> list[sublime.Region]:
+    """
+    Merge a batch of regions or lists of regions into sorted,
+    non-overlapping regions.
+
+    Adjacent regions are joined.
+    """
+    regions = []
+    for item in batch:
+        if isinstance(item, sublime.Region):
+            regions.append(item)
+        else:
+            regions.extend(item)
+
+    merged: list[sublime.Region] = []
+    for region in sorted(regions, key=lambda r: (r.begin(), r.end())):
+        if merged and region.begin() <= merged[-1].end():
+            if region.end() > merged[-1].end():
+                merged[-1] = sublime.Region(merged[-1].begin(), region.end())
+        else:
+            merged.append(sublime.Region(region.begin(), region.end()))
+    return merged
+
+
+class DebounceCleanupListener(sublime_plugin.EventListener):
+    """
+    This class drops pending debounced calls of closed views and windows.
+    """
+
+    def on_close(self, view: sublime.View):
+        for debouncer in list(debouncers):
+            debouncer.forget(view)
+
+    def on_pre_close_window(self, window: sublime.Window):
+        for debouncer in list(debouncers):
+            debouncer.forget(window)
+
+
 # class DebouncedListener(sublime_plugin.EventListener):
 #     @debounced(500)
 #     def on_modified(self, view):
@@ -60,6 +496,10 @@ def debounced(delay_in_ms, sync=False):
 #     def on_modified_async(self, view):
 #         print("debounced EventListener.on_modified_async", view.id())
 
+#     @debounced(1000, mode=THROTTLE)
+#     def on_selection_modified_async(self, view):
+#         print("throttled EventListener.on_selection_modified_async", view.id())
+
 
 # class DebouncedViewListener(sublime_plugin.ViewEventListener):
 #     @debounced(1000)
@@ -5,13 +5,103 @@ import os
 import sublime
 import sublime_plugin
 
+from collections import deque
 from pathlib import Path
+from time import monotonic
+from typing import Callable
 from urllib.parse import unquote
 
 from .select_syntax import SyntaxInputHandler
 
 DEBUG = False
 
+# indexing
+
+
+class ViewIndex:
+    """
+    This class describes an index of views by buffer id and file name.
+
+    It is kept up to date by `ViewIndexListener`
+    to find clones of views without iterating all views of a window.
+    """
+
+    def __init__(self):
+        self.buffers: dict[int, set[int]] = {}
+        self.files: dict[str, set[int]] = {}
+        self.views: dict[int, tuple[int, str | None]] = {}
+
+    def add(self, view: sublime.View) -> None:
+        view_id = view.id()
+        self.remove(view_id)
+        buffer_id = view.buffer_id()
+        file_name = view.file_name()
+        self.views[view_id] = (buffer_id, file_name)
+        self.buffers.setdefault(buffer_id, set()).add(view_id)
+        if file_name:
+            self.files.setdefault(file_name, set()).add(view_id)
+
+    def remove(self, view_id: int) -> None:
+        entry = self.views.pop(view_id, None)
+        if entry is None:
+            return
+
+        buffer_id, file_name = entry
+        discard_view_id(self.buffers, buffer_id, view_id)
+        if file_name:
+            discard_view_id(self.files, file_name, view_id)
+
+    def clones(self, view: sublime.View) -> list[sublime.View]:
+        """
+        Return all other views of the view's buffer.
+        """
+        view_id = view.id()
+        if view_id not in self.views:
+            self.add(view)
+        return [
+            sublime.View(other_id)
+            for other_id in self.buffers.get(view.buffer_id(), ())
+            if other_id != view_id
+        ]
+
+    def views_of_file(self, file_name: str) -> list[sublime.View]:
+        return [sublime.View(view_id) for view_id in self.files.get(file_name, ())]
+
+
+def discard_view_id(index: dict, key, view_id: int) -> None:
+    view_ids = index.get(key)
+    if view_ids:
+        view_ids.discard(view_id)
+        if not view_ids:
+            del index[key]
+
+
+view_index = ViewIndex()
+
+
+def plugin_loaded():
+    for window in sublime.windows():
+        for view in window.views():
+            view_index.add(view)
+
+
+class ViewIndexListener(sublime_plugin.EventListener):
+    def on_new(self, view):
+        view_index.add(view)
+
+    def on_clone(self, view):
+        view_index.add(view)
+
+    def on_load(self, view):
+        view_index.add(view)
+
+    def on_post_save(self, view):
+        # file name changes when saving new files or saving as
+        view_index.add(view)
+
+    def on_close(self, view):
+        view_index.remove(view.id())
+
 # creating
 
 
@@ -49,9 +139,102 @@ class NewFileWithSyntaxCommand(sublime_plugin.WindowCommand):
         return "Syntax"
 
 
-class AlwaysOpenFileWithSyntaxCommand(sublime_plugin.TextCommand):
-    cur_syntax = ""
+class SyntaxAssociationIndex:
+    """
+    This class describes an index of file extensions to syntaxes claiming them.
+
+    Syntaxes claim file extensions via "extensions" setting in their
+    ``<Syntax>.sublime-settings`` file. All those files are loaded once
+    on first use and reloaded individually, when ST reports them changed.
+    """
+
+    def __init__(self):
+        self.extensions: dict[str, set[str]] = {}
+        self.settings_files: dict[str, list[str]] = {}
+        self.loaded = False
+
+    def load(self) -> None:
+        if self.loaded:
+            return
+
+        self.loaded = True
+        for syntax in sublime.list_syntaxes():
+            settings_file = syntax_settings_file(syntax)
+            if settings_file not in self.settings_files:
+                self.update(settings_file)
+                settings = sublime.load_settings(settings_file)
+                settings.clear_on_change("syntax_association_index")
+                settings.add_on_change(
+                    "syntax_association_index", lambda f=settings_file: self.update(f)
+                )
+
+    def update(self, settings_file: str) -> None:
+        for ext in self.settings_files.pop(settings_file, ()):
+            claimants = self.extensions.get(ext)
+            if claimants:
+                claimants.discard(settings_file)
+                if not claimants:
+                    del self.extensions[ext]
+
+        extensions = sublime.load_settings(settings_file).get("extensions")
+        if not isinstance(extensions, list):
+            extensions = []
+
+        self.settings_files[settings_file] = extensions
+        for ext in extensions:
+            self.extensions.setdefault(ext, set()).add(settings_file)
+
+    def claimants(self, ext: str) -> set[str]:
+        """
+        Return settings files of all syntaxes claiming a file extension.
+        """
+        self.load()
+        return self.extensions.get(ext, set())
+
+    def conflicts(self) -> dict[str, set[str]]:
+        """
+        Return all file extensions, which are claimed by more than one syntax.
+        """
+        self.load()
+        return {ext: files for ext, files in self.extensions.items() if len(files) > 1}
+
+    def assign(self, syntax: sublime.Syntax, extensions: list[str]) -> None:
+        """
+        Associate file extensions with a syntax.
+
+        Extensions are removed from all other syntaxes claiming them,
+        before being added to `syntax`. Each affected settings file
+        is written only once.
+        """
+        self.load()
+        extensions = list(dict.fromkeys(extensions))
+        target = syntax_settings_file(syntax)
+        changes: dict[str, list[str]] = {}
+
+        for ext in extensions:
+            for settings_file in self.claimants(ext) - {target}:
+                changes.setdefault(settings_file, list(self.settings_files[settings_file]))
+                changes[settings_file].remove(ext)
+
+        suffixes = set(self.settings_files.get(target, ()))
+        if not suffixes.issuperset(extensions):
+            changes[target] = sorted(suffixes.union(extensions))
+
+        for settings_file, suffixes in changes.items():
+            sublime.load_settings(settings_file).set("extensions", suffixes)
+            sublime.save_settings(settings_file)
+            # don't wait for on_change notifications to keep the index consistent
+            self.update(settings_file)
+
+
+def syntax_settings_file(syntax: sublime.Syntax) -> str:
+    return f"{Path(syntax.path).stem}.sublime-settings"
+
+
+syntax_association_index = SyntaxAssociationIndex()
+
 
+class AlwaysOpenFileWithSyntaxCommand(sublime_plugin.TextCommand):
     def is_enabled(self) -> bool:
         return bool(self.view.file_name())
 
@@ -70,40 +253,13 @@ class AlwaysOpenFileWithSyntaxCommand(sublime_plugin.TextCommand):
         if not new_syntax:
             return
 
-        # remove manual file association from old syntax
-        cur_syntax = sublime.syntax_from_path(self.cur_syntax)
-        if cur_syntax and cur_syntax != new_syntax:
-            settings_file = f"{Path(cur_syntax.path).stem}.sublime-settings"
-            settings = sublime.load_settings(settings_file)
-            suffixes = settings.get("extensions")
-            if isinstance(suffixes, list):
-                try:
-                    suffixes.remove(file_suffix)
-                except ValueError:
-                    pass
-                else:
-                    settings.set("extensions", suffixes)
-                    sublime.save_settings(settings_file)
-
-        # add manual file associateion to new syntax
-        settings_file = f"{Path(new_syntax.path).stem}.sublime-settings"
-        settings = sublime.load_settings(settings_file)
-        suffixes = settings.get("extensions")
-        if isinstance(suffixes, list):
-            suffixes = set(suffixes)
-            suffixes.add(file_suffix)
-            suffixes = sorted(suffixes)
-        else:
-            suffixes = [file_suffix]
-
-        settings.set("extensions", suffixes)
-        sublime.save_settings(settings_file)
+        # move manual file association from other syntaxes to new syntax
+        syntax_association_index.assign(new_syntax, [file_suffix])
 
         # assign syntax
         self.view.assign_syntax(syntax)
 
     def input(self, args) -> sublime_plugin.CommandInputHandler | None:
-        self.cur_syntax = self.view.settings().get("syntax")
         if "syntax" not in args:
             return SyntaxInputHandler(self.view, args)
         return None
@@ -112,6 +268,67 @@ class AlwaysOpenFileWithSyntaxCommand(sublime_plugin.TextCommand):
         return "Syntax"
 
 
+class AssignExtensionsToSyntaxCommand(sublime_plugin.ApplicationCommand):
+    """
+    This class describes an `assign_extensions_to_syntax` command.
+
+    The command associates a list of file extensions with a syntax
+    and removes them from all other syntaxes claiming them.
+    """
+
+    def run(self, syntax: str, extensions: list[str] | str) -> None:
+        new_syntax = sublime.syntax_from_path(syntax)
+        if not new_syntax:
+            return
+
+        if isinstance(extensions, str):
+            extensions = split_extensions(extensions)
+        if extensions:
+            syntax_association_index.assign(new_syntax, extensions)
+            sublime.status_message(f"{len(extensions)} extension(s) assigned to {new_syntax.name}")
+
+    def input(self, args) -> sublime_plugin.CommandInputHandler | None:
+        if "extensions" not in args:
+            return ExtensionsInputHandler()
+        if "syntax" not in args:
+            return SyntaxInputHandler(None, args)
+        return None
+
+    def input_description(self) -> str:
+        return "Extensions"
+
+
+class ExtensionsInputHandler(sublime_plugin.TextInputHandler):
+    """
+    This class describes an input handler for a list of file extensions.
+
+    It previews syntaxes, which currently claim entered extensions.
+    """
+
+    def name(self) -> str:
+        return "extensions"
+
+    def placeholder(self) -> str:
+        return "Enter file extensions, like: ext1, ext2"
+
+    def preview(self, text: str) -> str | sublime.Html:
+        names = {syntax_settings_file(syntax): syntax.name for syntax in sublime.list_syntaxes()}
+        lines = []
+        for ext in split_extensions(text):
+            claimants = syntax_association_index.claimants(ext)
+            if claimants:
+                syntaxes = ", ".join(sorted(names.get(f, f) for f in claimants))
+                lines.append(f"<strong>{ext}:</strong> <small>{syntaxes}</small>")
+        return sublime.Html("<br>".join(lines))
+
+    def validate(self, text: str) -> bool:
+        return bool(split_extensions(text))
+
+
+def split_extensions(text: str) -> list[str]:
+    return [ext.lstrip(".") for ext in re.split(r"[\s,;]+", text) if ext.lstrip(".")]
+
+
 class CloneFileToNewGroupCommand(sublime_plugin.WindowCommand):
     """
     This class describes a `clone_file_to_new_group` command.
@@ -135,8 +352,12 @@ class CloneFileToNewGroupCommand(sublime_plugin.WindowCommand):
             # Check if a copy already exists in 'dst_group' and just
             # focus on it if so
             src_file = src_view.file_name()
-            for view in window.views_in_group(dst_group):
-                if view.file_name() == src_file:
+            if src_file:
+                candidates = view_index.views_of_file(src_file)
+            else:
+                candidates = view_index.clones(src_view)
+            for view in candidates:
+                if view.window() == window and window.get_view_index(view)[0] == dst_group:
                     window.focus_view(view)
                     return
 
@@ -153,6 +374,73 @@ class CloneFileToNewGroupCommand(sublime_plugin.WindowCommand):
         dst_view.sel().add_all(src_view.sel())
 
 
+# opening
+
+# selections to apply to views, which are still loading
+pending_locations: dict[int, list[tuple[int, int]]] = {}
+
+
+def open_file_at(
+    window: sublime.Window, file_name: str, locations: list[tuple[int, int]], flags: int = 0
+) -> sublime.View:
+    """
+    Open a file once and place a caret at each of the given locations.
+
+    :param locations: A list of 1-based ``(row, col)`` tuples.
+    """
+    if not locations:
+        return window.open_file(file_name, flags)
+
+    row, col = locations[0]
+    view = window.open_file(f"{file_name}:{row}:{col}", flags | sublime.ENCODED_POSITION)
+    if len(locations) > 1:
+        if view.is_loading():
+            pending_locations[view.id()] = locations
+        else:
+            select_locations(view, locations)
+    return view
+
+
+def select_locations(view: sublime.View, locations: list[tuple[int, int]]) -> None:
+    sel = view.sel()
+    sel.clear()
+    for row, col in locations:
+        sel.add(view.text_point(row - 1, col - 1))
+    view.show(sel[0])
+
+
+class OpenFileAtListener(sublime_plugin.EventListener):
+    def on_load(self, view):
+        locations = pending_locations.pop(view.id(), None)
+        if locations:
+            select_locations(view, locations)
+
+    def on_close(self, view):
+        pending_locations.pop(view.id(), None)
+
+
+# prefix of urls, passed by external tools via protocol handler
+URL_PREFIX_RE = re.compile(r"^(vscode|subl):(//)?((file|open)/)?")
+# file name with optional encoded row and column
+URL_LOCATION_RE = re.compile(r"^(.*?)(?::(\d+))?(?::(\d+))?$")
+# time in ms to wait for further urls, before opening a batch
+URL_BATCH_DELAY = 50
+
+# urls waiting to be opened per window
+pending_urls: dict[int, list[str]] = {}
+
+
+def parse_url(url: str) -> tuple[str, tuple[int, int] | None]:
+    """
+    Split a url into file name and optional 1-based ``(row, col)`` location.
+    """
+    match = URL_LOCATION_RE.match(unquote(URL_PREFIX_RE.sub("", url)))
+    file_name, row, col = match.groups()
+    if row:
+        return file_name, (int(row), int(col or 1))
+    return file_name, None
+
+
 class OpenFileFromUrlCommand(sublime_plugin.WindowCommand):
     R"""
     This class describes an open file from url command.
@@ -171,10 +459,49 @@ class OpenFileFromUrlCommand(sublime_plugin.WindowCommand):
     [HKEY_CLASSES_ROOT\vscode\shell\open\command]
     @="\"sublime_text.exe\" --command \"open_file_from_url {\\\"url\\\": \\\"%1\\\"}\""
 
+    Urls arriving within `URL_BATCH_DELAY` are opened as one batch. Each file
+    is opened only once, with a caret placed at each requested location.
+    The number of new tabs a batch may open is limited by
+    "open_url_max_tabs" setting.
     """
-    def run(self, url):
-        url = unquote(re.sub(r"^(vscode|subl):(//)?((file|open)/)?", "", url))
-        self.window.open_file(url, sublime.ENCODED_POSITION)
+
+    def run(self, url: str | None = None, urls: list[str] | None = None):
+        queue = pending_urls.get(self.window.id())
+        if queue is None:
+            queue = pending_urls[self.window.id()] = []
+            sublime.set_timeout(self.flush, URL_BATCH_DELAY)
+
+        if url:
+            queue.append(url)
+        if urls:
+            queue.extend(urls)
+
+    def flush(self):
+        urls = pending_urls.pop(self.window.id(), [])
+        if not self.window.is_valid():
+            return
+
+        files: dict[str, list[tuple[int, int]]] = {}
+        for url in urls:
+            file_name, location = parse_url(url)
+            locations = files.setdefault(file_name, [])
+            if location and location not in locations:
+                locations.append(location)
+
+        max_tabs = sublime.load_settings("Preferences.sublime-settings").get(
+            "open_url_max_tabs", 20
+        )
+        skipped = 0
+        for file_name, locations in files.items():
+            if not self.window.find_open_file(file_name):
+                if max_tabs <= 0:
+                    skipped += 1
+                    continue
+                max_tabs -= 1
+            open_file_at(self.window, file_name, locations)
+
+        if skipped:
+            sublime.status_message(f"{skipped} file(s) not opened, too many urls at once")
 
 # saving
 
@@ -194,18 +521,131 @@ class CreatePathListener(sublime_plugin.EventListener):
         os.makedirs(os.path.dirname(view.file_name()), exist_ok=True)
 
 
+class SaveQueue:
+    """
+    This class describes a queue of views to save asynchronously.
+
+    At most `max_concurrent` saves are in flight at a time. A save is treated
+    as failed, if the view is closed or still dirty after `timeout` seconds.
+    Progress is displayed in status bar, failures in an output panel.
+    """
+
+    def __init__(
+        self,
+        window: sublime.Window,
+        views: list[sublime.View],
+        max_concurrent: int = 4,
+        timeout: float = 30.0,
+        on_done: Callable[[SaveQueue], None] | None = None,
+    ):
+        self.window = window
+        self.pending = deque(views)
+        self.in_flight: dict[int, tuple[sublime.View, float]] = {}
+        self.max_concurrent = max(1, max_concurrent)
+        self.timeout = timeout
+        self.on_done = on_done
+        self.total = len(views)
+        self.saved: list[sublime.View] = []
+        self.failed: list[tuple[sublime.View, str]] = []
+
+    def start(self) -> None:
+        self.fill()
+        self.poll()
+
+    def fill(self) -> None:
+        while self.pending and len(self.in_flight) < self.max_concurrent:
+            view = self.pending.popleft()
+            if not view.is_valid():
+                continue
+            save_queues[view.id()] = self
+            self.in_flight[view.id()] = (view, monotonic())
+            view.run_command("save", {"async": True})
+
+    def done(self, view: sublime.View, error: str = "") -> None:
+        if self.in_flight.pop(view.id(), None) is None:
+            return
+
+        save_queues.pop(view.id(), None)
+        if error:
+            self.failed.append((view, error))
+        else:
+            self.saved.append(view)
+
+        self.window.status_message(
+            f"Saving files… {len(self.saved) + len(self.failed)}/{self.total}"
+        )
+        self.fill()
+
+    def poll(self) -> None:
+        now = monotonic()
+        for view, started in list(self.in_flight.values()):
+            if not view.is_valid():
+                self.done(view, "view was closed")
+            elif not view.is_dirty():
+                self.done(view)
+            elif now - started > self.timeout:
+                self.done(view, "timed out")
+
+        if self.in_flight or self.pending:
+            sublime.set_timeout(self.poll, 200)
+        else:
+            self.finish()
+
+    def finish(self) -> None:
+        message = f"Saved {len(self.saved)} of {self.total} files."
+        if self.failed:
+            panel = self.window.create_output_panel("save_queue")
+            panel.run_command(
+                "append",
+                {
+                    "characters": "\n".join(
+                        [message]
+                        + [f"{view.file_name()}: {error}" for view, error in self.failed]
+                    )
+                },
+            )
+            self.window.run_command("show_panel", {"panel": "output.save_queue"})
+        self.window.status_message(message)
+
+        if self.on_done:
+            self.on_done(self)
+
+
+save_queues: dict[int, SaveQueue] = {}
+
+
+class SaveQueueListener(sublime_plugin.EventListener):
+    def on_post_save(self, view):
+        queue = save_queues.get(view.id())
+        if queue:
+            queue.done(view)
+
+
 class SaveAllExistingCommand(sublime_plugin.WindowCommand):
     """
     This class describes a `save_all_existing` command.
 
-    The command only saves views, which are associated with files on disk.
+    The command only saves modified views, which are associated with files on disk.
     Any new or scratch view, which has not yet been saved to disk, is ignored.
+
+    ```json
+    { "command": "save_all_existing", "args": {"all_windows": false, "max_concurrent": 4} }
+    ```
+
+    :param all_windows:    Save views of all windows instead of active one only.
+    :param max_concurrent: Maximum number of files to save concurrently.
     """
 
-    def run(self):
-        for view in self.window.views():
-            if view.file_name():
-                view.run_command("save", {"async": True})
+    def run(self, all_windows: bool = False, max_concurrent: int = 4):
+        windows = sublime.windows() if all_windows else [self.window]
+        views = [
+            view
+            for window in windows
+            for view in window.views()
+            if view.file_name() and view.is_dirty()
+        ]
+        if views:
+            SaveQueue(self.window, views, max_concurrent).start()
 
 
 # closing
@@ -213,11 +653,8 @@ class SaveAllExistingCommand(sublime_plugin.WindowCommand):
 def find_clone(view: sublime.View) -> sublime.View | None:
     w = view.window()
     if w is not None:
-        bid = view.buffer_id()
-        vid = view.id()
-
-        for v in w.views():
-            if bid == v.buffer_id() and vid != v.id():
+        for v in view_index.clones(view):
+            if v.window() == w:
                 return v
 
     return None
@@ -263,9 +700,70 @@ class CloseImmediatelyCommand(sublime_plugin.WindowCommand):
 
 
 class CloseAllInGroup(sublime_plugin.WindowCommand):
+    """
+    This class describes a `close_all_in_group` command.
+
+    It closes all views of the active group like `close_immediately` does,
+    but decides how to close each view upfront. Dirty files are saved
+    concurrently, before all views are closed in one sweep.
+    Views, whose files failed to save, are kept open.
+    """
+
     def run(self, save=True):
-        group = self.window.active_group()
-        if not group:
+        window = self.window
+        group = window.active_group()
+        if group < 0:
             return
-        for view in self.window.views_in_group(group):
-            self.window.run_command("close_immediately", {"save": save})
+
+        views = window.views_in_group(group)
+        closing = {view.id() for view in views}
+
+        # views to close without prompting
+        scratch: list[sublime.View] = []
+        # dirty views to save before closing
+        dirty: list[sublime.View] = []
+        # scratch state of buffers, which remain open in other views
+        restore: dict[int, tuple[sublime.View, bool]] = {}
+        handled: set[int] = set()
+
+        for view in views:
+            buffer_id = view.buffer_id()
+            if buffer_id in handled:
+                scratch.append(view)
+                continue
+            handled.add(buffer_id)
+
+            for clone in view_index.clones(view):
+                if clone.id() not in closing and clone.is_valid():
+                    if DEBUG:
+                        print("Close clone")
+                    restore[buffer_id] = (clone, view.is_scratch())
+                    scratch.append(view)
+                    break
+            else:
+                fname = view.file_name()
+                if not save or not fname or not os.path.exists(fname):
+                    if DEBUG:
+                        print("Close deleted file")
+                    scratch.append(view)
+                elif view.is_dirty():
+                    if DEBUG:
+                        print("Save and close file")
+                    dirty.append(view)
+
+        def close_all(queue: SaveQueue | None = None) -> None:
+            failed = {view.buffer_id() for view, _ in queue.failed} if queue else set()
+            for view in scratch:
+                if view.buffer_id() not in failed:
+                    view.set_scratch(True)
+            for view in views:
+                if view.is_valid() and view.buffer_id() not in failed:
+                    view.close()
+            # restore scratch state of clones
+            for clone, is_scratch in restore.values():
+                clone.set_scratch(is_scratch)
+
+        if dirty:
+            SaveQueue(window, dirty, on_done=close_all).start()
+        else:
+            close_all()
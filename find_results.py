@@ -1,26 +1,232 @@
 from __future__ import annotations
 
+from array import array
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from fnmatch import fnmatch
+from functools import partial
+from threading import Lock
+from typing import Iterator, NamedTuple
 import bisect
+import hashlib
+import json
 import os
 import re
+import shutil
+import tempfile
 import sublime
 import sublime_plugin
 
+from .files import open_file_at
+
 __all__ = [
+    "FindresultsApplyEditsCommand",
+    "FindresultsEditCommand",
+    "FindresultsExportCommand",
+    "FindresultsFilterCommand",
     "FindresultsGotoFile",
     "FindresultsGotoMatch",
     "FindresultsOpenFileCommand",
+    "FindresultsShowFilesCommand",
     "FindresultsListener",
 ]
 
+FILE_NAME_SELECTOR = "entity.name.filename.find-in-files"
+# candidates of file name headers, which are verified by scope
+FILE_NAME_PATTERN = r"^\S.*(?=:$)"
+# number of characters to read from Find Results at once
+CHUNK_SIZE = 1 << 20
 
-class FindresultsGoto(sublime_plugin.TextCommand):
-    def __init__(self, view):
-        super().__init__(view)
-        self.beg = []
-        self.end = []
+# line number and separator in front of matched or context lines
+LINE_NO_RE = re.compile(r"\s*(\d+)[: ] ")
+
+
+class RegionArray:
+    """
+    This class describes a sorted list of non-overlapping regions.
+
+    Begin and end points are stored in compact arrays,
+    which can be searched via ``bisect``.
+    """
+
+    __slots__ = ["beg", "end"]
+
+    def __init__(self):
+        self.beg = array("q")
+        self.end = array("q")
+
+    def __len__(self) -> int:
+        return len(self.beg)
+
+    def __getitem__(self, idx: int) -> sublime.Region:
+        return sublime.Region(self.beg[idx], self.end[idx])
+
+    def truncate(self, pt: int) -> int:
+        """
+        Remove all regions, which end at or after `pt`.
+
+        :returns: The number of remaining regions.
+        """
+        idx = bisect.bisect_left(self.end, pt)
+        del self.beg[idx:]
+        del self.end[idx:]
+        return idx
+
+    def copy(self) -> RegionArray:
+        other = RegionArray()
+        other.beg = array("q", self.beg)
+        other.end = array("q", self.end)
+        return other
+
+    def append(self, reg: sublime.Region) -> None:
+        self.beg.append(reg.a)
+        self.end.append(reg.b)
+
+    def update(self, regions: list[sublime.Region], pt: int) -> None:
+        """
+        Replace all regions, which end at or after `pt`, by new `regions`.
+
+        Regions in front of `pt` are assumed to be unchanged
+        and are neither removed nor converted again.
+        """
+        for reg in regions[self.truncate(pt):]:
+            self.append(reg)
+
+
+class MatchIndexChangeListener(sublime_plugin.TextChangeListener):
+    """
+    This class tracks modified ranges of a Find Results buffer.
+
+    It is attached to buffers by `MatchIndex` explicitly.
+    """
+
+    def __init__(self, index: MatchIndex):
+        super().__init__()
+        self.index = index
+
+    @classmethod
+    def is_applicable(cls, buffer: sublime.Buffer) -> bool:
+        return False
+
+    def on_text_changed(self, changes: list[sublime.TextChange]):
+        self.index.invalidate(min(change.a.pt for change in changes))
+
+
+class MatchIndex:
+    """
+    This class describes an index of file names and matches of a Find Results buffer.
+
+    The index is shared by all commands and views of a buffer. When results are
+    appended by an ongoing search, only new regions are added to the index.
+
+    File names are searched behind the first modified point only, when
+    results are appended. Matches
+    are only available via ``view.get_regions()``, which always returns all
+    of them, so only their conversion into the index is incremental.
+    """
+
+    def __init__(self, view: sublime.View):
+        self.files = RegionArray()
+        self.matches = RegionArray()
         self.revision = -1
+        self.dirty_from = 0
+        self.exists: dict[str, bool] = {}
+        self.summary: list[tuple[str, int]] = []
+        self.summary_revision = -1
+        self.listener = MatchIndexChangeListener(self)
+        self.listener.attach(view.buffer())
+
+    def invalidate(self, pt: int) -> None:
+        self.dirty_from = min(self.dirty_from, pt)
+
+    def update(self, view: sublime.View) -> None:
+        revision = view.change_count()
+        if self.revision == revision:
+            return
+
+        pt = self.dirty_from if self.listener.is_attached() else 0
+        if pt == 0:
+            self.exists.clear()
+        self.revision = revision
+        self.dirty_from = view.size()
+        self.update_files(view, pt)
+        self.matches.update(view.get_regions("match"), pt)
+
+    def update_files(self, view: sublime.View, pt: int) -> None:
+        """
+        Replace file name regions behind `pt` by those found in the view.
+        """
+        files = self.files
+        if not files.truncate(pt):
+            # a single API call is cheaper than searching each file name
+            files.update(view.find_by_selector(FILE_NAME_SELECTOR), 0)
+            return
+
+        pt = files.end[-1]
+        while True:
+            reg = view.find(FILE_NAME_PATTERN, pt)
+            if reg.a < 0:
+                break
+            if view.match_selector(reg.a, FILE_NAME_SELECTOR):
+                reg = view.expand_to_scope(reg.a, FILE_NAME_SELECTOR) or reg
+                files.append(reg)
+            pt = max(reg.b, reg.a + 1)
+
+    def file_name(self, view: sublime.View, pt: int) -> str | None:
+        """
+        Return name of the file, whose results contain `pt`.
+        """
+        idx = bisect.bisect_right(self.files.beg, pt) - 1
+        if idx < 0:
+            return None
+
+        file_name = view.substr(self.files[idx])
+        exists = self.exists.get(file_name)
+        if exists is None:
+            exists = self.exists[file_name] = os.path.exists(file_name)
+        return file_name if exists else None
+
+    def file_summary(self, view: sublime.View) -> list[tuple[str, int]]:
+        """
+        Return a list of file names and number of matches, in order of results.
+        """
+        if self.summary_revision != self.revision:
+            self.summary_revision = self.revision
+            files = self.files
+            beg = self.matches.beg
+            self.summary = []
+            lo = 0
+            for idx in range(len(files)):
+                if idx + 1 < len(files):
+                    hi = bisect.bisect_left(beg, files.beg[idx + 1], lo)
+                else:
+                    hi = len(beg)
+                self.summary.append((view.substr(files[idx]), hi - lo))
+                lo = hi
+
+        return self.summary
+
+    def close(self) -> None:
+        if self.listener.is_attached():
+            self.listener.detach()
+
 
+match_indexes: dict[int, MatchIndex] = {}
+
+
+def match_index(view: sublime.View) -> MatchIndex:
+    """
+    Return the up-to-date match index of a Find Results view.
+    """
+    buffer_id = view.buffer_id()
+    index = match_indexes.get(buffer_id)
+    if index is None:
+        index = match_indexes[buffer_id] = MatchIndex(view)
+    index.update(view)
+    return index
+
+
+class FindresultsGoto(sublime_plugin.TextCommand):
     def run(self, _, forward: bool = True):
         sel = self.view.sel()
         try:
@@ -28,78 +234,761 @@ class FindresultsGoto(sublime_plugin.TextCommand):
         except Exception:
             pt = 0
 
-        revision = self.view.change_count()
-        if self.revision != revision:
-            self.revision = revision
-            regs = self.get_matches()
-            if regs:
-                self.beg = [reg.a for reg in regs]
-                self.end = [reg.b for reg in regs]
-            else:
-                self.beg = []
-                self.end = []
+        regions = self.get_matches(match_index(self.view))
+        if not regions:
+            return
 
         if forward:
-            idx = bisect.bisect_right(self.beg, pt)
-            if idx >= len(self.beg):
+            idx = bisect.bisect_right(regions.beg, pt)
+            if idx >= len(regions):
                 idx = 0
         else:
-            idx = bisect.bisect_left(self.end, pt) - 1
+            idx = bisect.bisect_left(regions.end, pt) - 1
             if idx < 0:
-                idx = len(self.beg)
+                idx = len(regions) - 1
 
-        m = sublime.Region(self.beg[idx], self.end[idx])
+        m = regions[idx]
         sel.clear()
         sel.add(m)
         self.view.show(m)
 
-    def get_matches(self): ...
+    def get_matches(self, index: MatchIndex) -> RegionArray: ...
 
 
 class FindresultsGotoFile(FindresultsGoto):
-    def get_matches(self):
-        return self.view.find_by_selector("entity.name.filename.find-in-files")
+    def get_matches(self, index):
+        return index.files
 
 
 class FindresultsGotoMatch(FindresultsGoto):
-    def get_matches(self):
-        return self.view.get_regions("match")
+    def get_matches(self, index):
+        return index.matches
+
+
+class PreviewPool:
+    """
+    This class describes a bounded LRU pool of views opened for preview.
+
+    Views, which were already open before being previewed, are not tracked.
+    Evicted views are closed, unless they were modified.
+    """
+
+    def __init__(self, window: sublime.Window):
+        self.window = window
+        self.view_ids: OrderedDict[int, None] = OrderedDict()
+
+    def add(self, view: sublime.View, is_open: bool) -> None:
+        view_id = view.id()
+        if view_id in self.view_ids:
+            self.view_ids.move_to_end(view_id)
+        elif not is_open:
+            self.view_ids[view_id] = None
+
+        size = sublime.load_settings("Preferences.sublime-settings").get(
+            "find_results_preview_pool_size", 8
+        )
+        while len(self.view_ids) > max(1, size):
+            view_id, _ = self.view_ids.popitem(last=False)
+            evicted = sublime.View(view_id)
+            if evicted.is_valid() and not evicted.is_dirty() and evicted != view:
+                evicted.close()
+
+    def discard(self, view: sublime.View) -> None:
+        self.view_ids.pop(view.id(), None)
+
+
+preview_pools: dict[int, PreviewPool] = {}
+
+
+def preview_pool(window: sublime.Window) -> PreviewPool:
+    pool = preview_pools.get(window.id())
+    if pool is None:
+        pool = preview_pools[window.id()] = PreviewPool(window)
+    return pool
 
 
 class FindresultsOpenFileCommand(sublime_plugin.TextCommand):
-    def run(self, edit):
+    """
+    This class implements the `findresults_open_file` command.
+
+    It opens files of all selected results. Selections are grouped by file,
+    so each file is opened only once with a caret at each selected match.
+
+    ```json
+    { "command": "findresults_open_file", "args": {"transient": false, "background": false} }
+    ```
+
+    :param transient:  Open files as transient views.
+    :param background: Keep focus in Find Results.
+    :param preview:    Add opened files to the window's pool of previews,
+                       which automatically closes least recently previewed,
+                       unmodified views, if the pool grows beyond
+                       ``find_results_preview_pool_size``.
+    """
+
+    def run(self, edit, transient: bool = False, background: bool = False, preview: bool = False):
         view = self.view
-        for sel in view.sel():
-            line_no = self.get_line_no(sel)
-            file_name = self.get_file(sel)
-            if line_no and file_name:
-                file_loc = "%s:%s" % (file_name, line_no)
-                view.window().open_file(file_loc, sublime.ENCODED_POSITION)
-            elif file_name:
-                view.window().open_file(file_name)
-
-    def get_line_no(self, sel):
+        window = view.window()
+        if not window:
+            return
+
+        flags = sublime.TRANSIENT if transient else 0
+
+        for file_name, locations in self.get_locations().items():
+            is_open = window.find_open_file(file_name) is not None
+            opened_view = open_file_at(window, file_name, locations, flags)
+            if preview:
+                preview_pool(window).add(opened_view, is_open)
+            else:
+                # keep files opened for real, even if they were previewed before
+                preview_pool(window).discard(opened_view)
+
+        if background:
+            window.focus_view(view)
+
+    def get_locations(self) -> dict[str, list[tuple[int, int]]]:
+        """
+        Resolve all selections to a list of unique locations per file.
+        """
         view = self.view
-        line_text = view.substr(view.line(sel))
-        match = re.match(r"\s*(\d+).+", line_text)
-        if match:
-            return match.group(1)
+        index = match_index(view)
+        matches = index.matches
+
+        # ordered sets of locations per file
+        locations: dict[str, dict[tuple[int, int], None]] = {}
+        for sel in view.sel():
+            file_name = index.file_name(view, sel.begin())
+            if not file_name:
+                continue
+
+            file_locations = locations.setdefault(file_name, {})
+
+            line = view.line(sel)
+            match = LINE_NO_RE.match(view.substr(line))
+            if not match:
+                continue
+
+            # column of the selected match, the next one behind the caret
+            # or the last one on the line, if the caret is behind all matches
+            col = 1
+            text_begin = line.a + match.end()
+            pt = max(sel.begin(), text_begin)
+            idx = bisect.bisect_right(matches.beg, pt) - 1
+            if idx < 0 or matches.beg[idx] < text_begin or matches.end[idx] < pt:
+                idx += 1
+                if idx >= len(matches) or matches.beg[idx] >= line.b:
+                    idx -= 1
+            if 0 <= idx < len(matches) and text_begin <= matches.beg[idx] < line.b:
+                col = matches.beg[idx] - text_begin + 1
+
+            file_locations[(int(match.group(1)), col)] = None
+
+        return {file_name: list(file_locations) for file_name, file_locations in locations.items()}
+
+
+def iter_results(
+    view: sublime.View, files: RegionArray, matches: RegionArray, chunk_size: int = CHUNK_SIZE
+) -> Iterator[tuple[str, int, int, str, str]]:
+    """
+    Yield all matches of Find Results.
+
+    The view's content is read in chunks of whole lines, to keep memory usage
+    low, regardless of size of results.
+
+    :param files:   A copy of the index's file name regions.
+    :param matches: A copy of the index's match regions.
+                    Copies are required, as the index may be updated by the
+                    UI thread, while results are iterated in background.
+    :yields: Tuples of ``(file name, line, column, match, line text)``
+    """
+    files_beg = files.beg
+    files_end = files.end
+    matches_beg = matches.beg
+    matches_end = matches.end
+
+    file_idx = -1
+    file_name = ""
+    match_idx = 0
+    num_files = len(files_beg)
+    num_matches = len(matches_beg)
+
+    pos = 0
+    size = view.size()
+    while pos < size and match_idx < num_matches:
+        end = min(pos + chunk_size, size)
+        if end < size:
+            end = view.full_line(end).b
+
+        line_begin = pos
+        for line in view.substr(sublime.Region(pos, end)).split("\n"):
+            line_end = line_begin + len(line)
+
+            while file_idx + 1 < num_files and files_beg[file_idx + 1] < line_end:
+                file_idx += 1
+                file_name = view.substr(sublime.Region(files_beg[file_idx], files_end[file_idx]))
+
+            while match_idx < num_matches and matches_beg[match_idx] < line_begin:
+                match_idx += 1
+
+            if match_idx < num_matches and matches_beg[match_idx] < line_end:
+                match = LINE_NO_RE.match(line)
+                if match:
+                    line_no = int(match.group(1))
+                    text_begin = line_begin + match.end()
+                    text = line[match.end():]
+                    while match_idx < num_matches and matches_beg[match_idx] < line_end:
+                        a = matches_beg[match_idx] - line_begin
+                        b = min(matches_end[match_idx], line_end) - line_begin
+                        col = matches_beg[match_idx] - text_begin + 1
+                        yield file_name, line_no, col, line[a:b], text
+                        match_idx += 1
+
+            line_begin = line_end + 1
+
+        pos = end
+
+
+class FindresultsExportCommand(sublime_plugin.TextCommand):
+    """
+    This class implements the `findresults_export` command.
+
+    It writes all matches of Find Results to a file.
+
+    ```json
+    { "command": "findresults_export", "args": {"format": "jsonl", "path": "results.jsonl"} }
+    ```
+
+    :param format: The output format:
+                   ``"jsonl"`` writes a JSON object per match,
+                   ``"quickfix"`` writes ``file:line:column:text`` lines,
+                   which can be loaded into vim's quickfix list.
+    :param path:   The output file. An input panel is displayed, if omitted.
+    """
+
+    formats = {
+        "jsonl": ".jsonl",
+        "quickfix": ".qf",
+    }
+
+    def is_enabled(self, format: str = "jsonl", path: str | None = None) -> bool:
+        return format in self.formats and self.view.match_selector(0, "text.find-in-files")
+
+    def run(self, edit, format: str = "jsonl", path: str | None = None):
+        if path:
+            self.export(format, path)
+            return
+
+        window = self.view.window()
+        if not window:
+            return
+
+        folders = window.folders()
+        folder = folders[0] if folders else os.path.expanduser("~")
+        window.show_input_panel(
+            "Export Find Results to:",
+            os.path.join(folder, "find_results" + self.formats[format]),
+            lambda path: self.export(format, path),
+            None,
+            None,
+        )
+
+    def export(self, format: str, path: str) -> None:
+        # copy regions, as the index may be updated meanwhile by an ongoing search
+        index = match_index(self.view)
+        files = index.files.copy()
+        matches = index.matches.copy()
+        sublime.set_timeout_async(lambda: self.write(files, matches, format, path))
+
+    def write(self, files: RegionArray, matches: RegionArray, format: str, path: str) -> None:
+        count = 0
+        try:
+            with open(path, "w", encoding="utf-8") as f:
+                results = iter_results(self.view, files, matches)
+                for file_name, line, col, match, text in results:
+                    if format == "quickfix":
+                        f.write(f"{file_name}:{line}:{col}:{text}\n")
+                    else:
+                        f.write(
+                            json.dumps(
+                                {
+                                    "file": file_name,
+                                    "line": line,
+                                    "column": col,
+                                    "match": match,
+                                    "text": text,
+                                },
+                                ensure_ascii=False,
+                            )
+                        )
+                        f.write("\n")
+                    count += 1
+        except OSError as e:
+            sublime.error_message(f"Failed to export Find Results!\n\n{e}")
+            return
+
+        sublime.status_message(f"Exported {count} matches to {path}")
+
+
+class FilterPathInputHandler(sublime_plugin.TextInputHandler):
+    def name(self):
+        return "path"
+
+    def placeholder(self):
+        return "File pattern like *.py or -*/vendor/*"
+
+    def next_input(self, args):
+        if "pattern" not in args:
+            return FilterPatternInputHandler()
         return None
 
-    def get_file(self, sel):
-        view = self.view
-        line = view.line(sel)
-        while line.begin() > 0:
-            line_text = view.substr(line)
-            match = re.match(r"(.+):$", line_text)
-            if match:
-                if os.path.exists(match.group(1)):
-                    return match.group(1)
-            line = view.line(line.begin() - 1)
+
+class FilterPatternInputHandler(sublime_plugin.TextInputHandler):
+    def name(self):
+        return "pattern"
+
+    def placeholder(self):
+        return "Regular expression matched lines must match, if any"
+
+    def validate(self, text):
+        try:
+            re.compile(text)
+        except re.error:
+            return False
+        return True
+
+
+class FindresultsFilterCommand(sublime_plugin.TextCommand):
+    """
+    This class implements the `findresults_filter` command.
+
+    It creates a new read-only Find Results view containing only those
+    results, whose file names match `path` and whose matched lines match
+    `pattern`, without re-running the search.
+
+    ```json
+    { "command": "findresults_filter", "args": {"path": "*.py", "pattern": "TODO"} }
+    ```
+
+    :param path:    A file name pattern. Files matching a pattern
+                    with leading ``-`` are removed.
+                    Patterns without path separator match base names only.
+    :param pattern: A regular expression, matched lines must match.
+                    Context lines are dropped, if given.
+    """
+
+    def is_enabled(self, path: str = "", pattern: str = "") -> bool:
+        return self.view.match_selector(0, "text.find-in-files")
+
+    def input(self, args):
+        if not args.get("path") and not args.get("pattern"):
+            return FilterPathInputHandler()
         return None
 
+    def input_description(self):
+        return "Filter Results"
+
+    def run(self, edit, path: str = "", pattern: str = ""):
+        window = self.view.window()
+        if not window:
+            return
+
+        try:
+            regex = re.compile(pattern) if pattern else None
+        except re.error as e:
+            sublime.error_message(f"Invalid pattern!\n\n{e}")
+            return
+
+        text, regions, num_files = self.filter(path.strip(), regex)
+
+        view = window.new_file()
+        view.set_name("Find Results (filtered)")
+        view.set_scratch(True)
+        settings = self.view.settings()
+        view.assign_syntax(settings.get("syntax"))
+        for key in ("result_base_dir", "result_file_regex", "result_line_regex"):
+            view.settings().set(key, settings.get(key))
+        view.run_command("append", {"characters": text})
+        view.add_regions("match", regions, "", "", sublime.DRAW_NO_FILL)
+        view.set_read_only(True)
+
+        window.status_message(f"{len(regions)} matches in {num_files} files")
+
+    def filter(
+        self, path: str, regex: re.Pattern | None
+    ) -> tuple[str, list[sublime.Region], int]:
+        """
+        Return text and match regions of filtered results and number of files.
+        """
+        view = self.view
+        index = match_index(view)
+        files = index.files
+        matches = index.matches
+
+        exclude = path.startswith("-")
+        if exclude:
+            path = path[1:]
+
+        chunks = []
+        regions = []
+        num_files = 0
+        offset = 0
+
+        def append(source: sublime.Region) -> None:
+            nonlocal offset
+            chunks.append(view.substr(source))
+            # translate matches of source region to target
+            idx = bisect.bisect_left(matches.beg, source.a)
+            while idx < len(matches) and matches.beg[idx] < source.b:
+                regions.append(
+                    sublime.Region(
+                        matches.beg[idx] - source.a + offset,
+                        min(matches.end[idx], source.b) - source.a + offset,
+                    )
+                )
+                idx += 1
+            offset += source.b - source.a
+
+        for idx in range(len(files)):
+            file_name = view.substr(files[idx])
+            if path:
+                name = file_name if "/" in path or "\\" in path else os.path.basename(file_name)
+                if fnmatch(name, path) == exclude:
+                    continue
+
+            header = view.full_line(files[idx].a)
+            block = view.find("\n\n", header.a, sublime.LITERAL)
+            block_end = block.a + 1 if block else view.size()
+
+            if regex is None:
+                append(sublime.Region(header.a, min(block_end + 1, view.size())))
+                num_files += 1
+                continue
+
+            # visit lines containing matches only
+            lines = []
+            line = None
+            match_idx = bisect.bisect_left(matches.beg, header.b)
+            while match_idx < len(matches) and matches.beg[match_idx] < block_end:
+                if line is None or matches.beg[match_idx] >= line.b:
+                    line = view.full_line(matches.beg[match_idx])
+                    text = view.substr(line)
+                    match = LINE_NO_RE.match(text)
+                    if match and regex.search(text[match.end():]):
+                        lines.append(line)
+                match_idx += 1
+
+            if lines:
+                append(header)
+                for line in lines:
+                    append(line)
+                chunks.append("\n")
+                offset += 1
+                num_files += 1
+
+        return "".join(chunks), regions, num_files
+
+
+class FileFingerprint(NamedTuple):
+    mtime: float
+    digest: str
+
+
+class EditedLine(NamedTuple):
+    file_name: str
+    line_no: int
+    text: str
+    """The original text of the line, as displayed in Find Results."""
+
+
+class EditSession:
+    """
+    This class describes the state of Find Results being edited.
+
+    Each result line, including its line number, is tracked by a region,
+    which moves with modifications. Files are fingerprinted in background to detect
+    modifications on disk, before edits are written.
+    """
+
+    key = "findresults_edit"
+
+    def __init__(self, view: sublime.View):
+        self.view = view
+        self.lines: list[EditedLine] = []
+        self.fingerprints: dict[str, Future] = {}
+
+        index = match_index(view)
+        regions = []
+        for reg in view.find_all(r"^\s*\d+[: ] "):
+            file_name = index.file_name(view, reg.a)
+            if not file_name:
+                continue
+            line_no = int(view.substr(reg).strip(" :"))
+            line = view.line(reg.a)
+            regions.append(line)
+            text = view.substr(sublime.Region(reg.b, line.b))
+            self.lines.append(EditedLine(file_name, line_no, text))
+            if file_name not in self.fingerprints:
+                self.fingerprints[file_name] = edit_executor.submit(fingerprint, file_name)
+
+        view.add_regions(self.key, regions, "", "", sublime.HIDDEN)
+
+    def edits(self) -> tuple[dict[str, dict[int, tuple[str, str]]], list[str]]:
+        """
+        Return modified lines as ``{file_name: {line_no: (old, new)}}``
+        and a list of errors about result lines, which can't be applied.
+
+        Lines, whose line number was removed or which were deleted as a whole,
+        are skipped and reported as error.
+        """
+        regions = self.view.get_regions(self.key)
+        if len(regions) != len(self.lines):
+            return {}, ["Result lines were added or removed, no edits applied."]
+
+        edits = {}
+        errors = []
+        for line, region in zip(self.lines, regions):
+            text = self.view.substr(region)
+            match = LINE_NO_RE.match(text)
+            if not match or int(match.group(1)) != line.line_no:
+                errors.append(f"{line.file_name}:{line.line_no}: result line was removed")
+                continue
+
+            text = text[match.end():]
+            if text != line.text:
+                edits.setdefault(line.file_name, {})[line.line_no] = (line.text, text)
+        return edits, errors
+
+    def close(self) -> None:
+        self.view.erase_regions(self.key)
+        for future in self.fingerprints.values():
+            future.cancel()
+
+
+edit_executor = ThreadPoolExecutor(4, "findresults_edit")
+edit_sessions: dict[int, EditSession] = {}
+
+
+def fingerprint(file_name: str) -> FileFingerprint:
+    with open(file_name, "rb") as f:
+        mtime = os.fstat(f.fileno()).st_mtime
+        return FileFingerprint(mtime, hashlib.sha1(f.read()).hexdigest())
+
+
+def write_edits(
+    file_name: str, edits: dict[int, tuple[str, str]], expected: FileFingerprint
+) -> None:
+    """
+    Replace lines of a file, if it was not modified since edits started.
+
+    The file is written to a temporary file, which then atomically replaces
+    the original one.
+
+    :raises OSError: if file can't be read or written.
+    :raises ValueError: if file was modified or edits are invalid.
+    """
+    # write to the target of symbolic links, to keep links intact
+    file_name = os.path.realpath(file_name)
+
+    with open(file_name, "rb") as f:
+        mtime = os.fstat(f.fileno()).st_mtime
+        data = f.read()
+
+    if FileFingerprint(mtime, hashlib.sha1(data).hexdigest()) != expected:
+        raise ValueError("file was modified on disk")
+
+    # ST separates lines by "\n" only
+    lines = data.decode("utf-8").split("\n")
+    for line_no, (old, new) in edits.items():
+        if "\n" in new:
+            raise ValueError(f"line {line_no}: adding lines is not supported")
+        if line_no > len(lines):
+            raise ValueError(f"line {line_no}: does not exist")
+        line = lines[line_no - 1]
+        text = line[:-1] if line.endswith("\r") else line
+        if text != old:
+            raise ValueError(f"line {line_no}: content differs from results")
+        lines[line_no - 1] = new + line[len(text):]
+
+    fd, temp_name = tempfile.mkstemp(dir=os.path.dirname(file_name), prefix=".findresults-")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write("\n".join(lines).encode("utf-8"))
+        shutil.copymode(file_name, temp_name)
+        os.replace(temp_name, file_name)
+    except BaseException:
+        os.unlink(temp_name)
+        raise
+
+
+class FindresultsEditCommand(sublime_plugin.TextCommand):
+    """
+    This class implements the `findresults_edit` command.
+
+    It makes Find Results editable, to modify matched lines in place.
+    Modifications are written to files via `findresults_apply_edits`.
+    """
+
+    def is_enabled(self) -> bool:
+        return (
+            self.view.match_selector(0, "text.find-in-files")
+            and self.view.id() not in edit_sessions
+        )
+
+    def run(self, edit):
+        edit_sessions[self.view.id()] = EditSession(self.view)
+        self.view.settings().set("findresults_editing", True)
+        self.view.set_read_only(False)
+        sublime.status_message("Find Results: Edit lines and run 'Apply Edits' to save them.")
+
+
+class FindresultsApplyEditsCommand(sublime_plugin.TextCommand):
+    """
+    This class implements the `findresults_apply_edits` command.
+
+    It writes lines, modified in Find Results, back to their files using a pool
+    of worker threads and makes Find Results read-only again. Files, which
+    were modified on disk after editing started, are skipped.
+    """
+
+    def is_enabled(self) -> bool:
+        return self.view.id() in edit_sessions
+
+    def run(self, edit):
+        session = edit_sessions.pop(self.view.id(), None)
+        if not session:
+            return
+
+        self.view.settings().erase("findresults_editing")
+        self.view.set_read_only(True)
+
+        edits, errors = session.edits()
+        futures = {
+            file_name: edit_executor.submit(
+                lambda f, e: write_edits(f, e, session.fingerprints[f].result()),
+                file_name,
+                file_edits,
+            )
+            for file_name, file_edits in edits.items()
+        }
+        session.view.erase_regions(session.key)
+
+        lock = Lock()
+        failed = 0
+        remaining = len(futures)
+
+        def done(file_name: str, future: Future) -> None:
+            nonlocal failed, remaining
+            try:
+                future.result()
+            except Exception as e:
+                with lock:
+                    failed += 1
+                    errors.append(f"{file_name}: {e}")
+            finally:
+                with lock:
+                    remaining -= 1
+                    finished = not remaining
+                if finished:
+                    sublime.set_timeout(report)
+
+        def report() -> None:
+            num_written = len(futures) - failed
+            message = f"Find Results: {num_written} of {len(futures)} files written."
+            sublime.status_message(message)
+            if errors:
+                window = self.view.window()
+                if window:
+                    panel = window.create_output_panel("findresults_edit")
+                    panel.run_command("append", {"characters": "\n".join([message, *errors])})
+                    window.run_command("show_panel", {"panel": "output.findresults_edit"})
+
+        if futures:
+            for file_name, future in futures.items():
+                future.add_done_callback(partial(done, file_name))
+        else:
+            report()
+
+
+class FindresultsShowFilesCommand(sublime_plugin.TextCommand):
+    """
+    This class implements the `findresults_show_files` command.
+
+    It displays a quick panel with all files of Find Results and their
+    number of matches. Selecting an item moves caret to the file's results.
+
+    ```json
+    { "command": "findresults_show_files", "args": {"sort": "count"} }
+    ```
+
+    :param sort: Sort files by ``"count"`` of matches, ``"path"`` or
+                 keep order of results, if omitted.
+    """
+
+    def is_enabled(self, sort: str | None = None) -> bool:
+        return self.view.match_selector(0, "text.find-in-files")
+
+    def run(self, edit, sort: str | None = None):
+        window = self.view.window()
+        if not window:
+            return
+
+        index = match_index(self.view)
+        summary = list(enumerate(index.file_summary(self.view)))
+        if not summary:
+            return
+
+        if sort == "count":
+            summary.sort(key=lambda item: (-item[1][1], item[1][0]))
+        elif sort == "path":
+            summary.sort(key=lambda item: item[1][0])
+
+        kind = (sublime.KIND_ID_NAVIGATION, "f", "File")
+        items = [
+            sublime.QuickPanelItem(
+                trigger=file_name,
+                annotation=f"{count} match{'es' if count != 1 else ''}",
+                kind=kind,
+            )
+            for _, (file_name, count) in summary
+        ]
+
+        def on_done(selected: int) -> None:
+            if selected < 0:
+                return
+            region = index.files[summary[selected][0]]
+            sel = self.view.sel()
+            sel.clear()
+            sel.add(region)
+            self.view.show_at_center(region)
+            window.focus_view(self.view)
+
+        window.show_quick_panel(items, on_done, placeholder="Find Results: Goto File")
+
 
 class FindresultsListener(sublime_plugin.EventListener):
     def on_activated(self, view):
-        if view.name() == "Find Results":
-            view.set_read_only(True)
+        if view.name() in ("Find Results", "Find Results (filtered)"):
+            if not view.settings().get("findresults_editing"):
+                view.set_read_only(True)
+
+    def on_modified_async(self, view):
+        # keep modified previews open
+        for pool in preview_pools.values():
+            pool.discard(view)
+
+    def on_close(self, view):
+        for pool in preview_pools.values():
+            pool.discard(view)
+
+    def on_pre_close_window(self, window):
+        preview_pools.pop(window.id(), None)
+
+    def on_pre_close(self, view):
+        session = edit_sessions.pop(view.id(), None)
+        if session:
+            session.close()
+
+        if len(view.buffer().views()) <= 1:
+            index = match_indexes.pop(view.buffer_id(), None)
+            if index:
+                index.close()
@@ -5,15 +5,27 @@ Implements:
 https://github.com/sublimehq/sublime_text/issues/3620
 """
 from __future__ import annotations
+from collections import Counter, OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor, wait
 from enum import IntEnum
+from fnmatch import fnmatch
 from pathlib import Path
+from threading import Lock, Thread
+from time import monotonic
+from typing import Callable, Iterable, NamedTuple
+import os
+import re
 
 import sublime
 import sublime_plugin
 
+from .debounce_decorator import debounced
+from .project_index import BoundedScandir, file_extension, project_index
+
 __all__ = [
     "FindInFilesCommitLocationCompletionCommand",
     "FindInFilesLocationCompletionListener",
+    "FindInFilesLocationMatchCountListener",
 ]
 
 IS_WINDOWS = sublime.platform() == "windows"
@@ -29,6 +41,122 @@ if IS_WINDOWS:
             bitmask >>= 1
 
 
+# maximum number of directory listings to keep in memory
+DIRECTORY_CACHE_SIZE = 256
+# maximum age of a cached listing in seconds,
+# to catch changes not reflected by a directory's mtime (e.g. network shares)
+DIRECTORY_CACHE_TTL = 30.0
+# maximum age of a cached incomplete listing in seconds,
+# so re-queries soon get a chance to scan the directory completely
+DIRECTORY_CACHE_TRUNCATED_TTL = 2.0
+# maximum number of ranked queries to keep in memory
+RANK_CACHE_SIZE = 32
+
+
+class DirectoryListing(NamedTuple):
+    names: frozenset[str]
+    """The names of sub directories."""
+    truncated: bool = False
+    """Indicates `names` to be incomplete."""
+
+
+class DirectoryCache:
+    """
+    This class describes a LRU cache of directory listings.
+
+    Each entry contains the names of sub directories of a folder. It is reused
+    as long as the folder's mtime is unchanged and the entry is not older than
+    `ttl` seconds, so typing within the same folder doesn't hit the disk again.
+    Incomplete listings expire after `truncated_ttl` seconds already.
+    """
+
+    def __init__(
+        self,
+        size: int = DIRECTORY_CACHE_SIZE,
+        ttl: float = DIRECTORY_CACHE_TTL,
+        truncated_ttl: float = DIRECTORY_CACHE_TRUNCATED_TTL,
+    ):
+        self.size = size
+        self.ttl = ttl
+        self.truncated_ttl = truncated_ttl
+        self.entries: OrderedDict[str, tuple[float, float, DirectoryListing]] = OrderedDict()
+        self.lock = Lock()
+
+    def clear(self) -> None:
+        with self.lock:
+            self.entries.clear()
+
+    def listdir(self, folder: Path | str) -> DirectoryListing:
+        """
+        Return names of all sub directories of `folder`.
+
+        Enumeration is bounded by number of entries and time. Unreadable entries
+        are skipped. The listing is marked truncated, if it is incomplete.
+
+        :raises OSError: if `folder` can't be accessed.
+        """
+        key = os.fspath(folder)
+        mtime = os.stat(key).st_mtime
+
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry:
+                cached_mtime, created, listing = entry
+                ttl = self.truncated_ttl if listing.truncated else self.ttl
+                if cached_mtime == mtime and monotonic() - created < ttl:
+                    self.entries.move_to_end(key)
+                    return listing
+
+        scan = BoundedScandir(key)
+        listing = DirectoryListing(
+            frozenset(entry.name for entry, is_dir in scan if is_dir), scan.truncated
+        )
+
+        with self.lock:
+            self.entries[key] = (mtime, monotonic(), listing)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.size:
+                self.entries.popitem(last=False)
+
+        return listing
+
+
+class DirectoryScanner:
+    """
+    This class describes a background directory scanner.
+
+    Directories are listed by a pool of worker threads, so slow or hung
+    network mounts never block the calling thread. Each folder is scanned
+    by at most one worker at a time, even if requested by several queries.
+    """
+
+    def __init__(self, cache: DirectoryCache, max_workers: int = 4):
+        self.cache = cache
+        self.executor = ThreadPoolExecutor(max_workers, "location_completions")
+        self.pending: dict[str, Future] = {}
+        self.lock = Lock()
+
+    def submit(self, folder: Path | str) -> Future:
+        key = os.fspath(folder)
+        with self.lock:
+            future = self.pending.get(key)
+            if future:
+                return future
+            future = self.executor.submit(self.cache.listdir, key)
+            self.pending[key] = future
+
+        future.add_done_callback(lambda _: self.discard(key))
+        return future
+
+    def discard(self, key: str) -> None:
+        with self.lock:
+            self.pending.pop(key, None)
+
+
+directory_cache = DirectoryCache()
+directory_scanner = DirectoryScanner(directory_cache)
+
+
 class LocationCompletionType(IntEnum):
     UNKNOWN = 0
     PATH = 1
@@ -57,6 +185,294 @@ def location_completion(
     )
 
 
+def fuzzy_score(query: str, name: str) -> int | None:
+    """
+    Return score of `name` fuzzy matching `query` or ``None`` if it doesn't match.
+
+    Names starting with query score best, followed by names matching query
+    characters consecutively or at word boundaries.
+    """
+    if not query:
+        return 0
+
+    lower_name = name.lower()
+    lower_query = query.lower()
+    if lower_name.startswith(lower_query):
+        return 1000 - len(name)
+
+    score = 0
+    pos = 0
+    last = -2
+    for char in lower_query:
+        idx = lower_name.find(char, pos)
+        if idx < 0:
+            return None
+        if idx == last + 1:
+            score += 10
+        elif idx == 0 or not name[idx - 1].isalnum() or name[idx].isupper():
+            score += 5
+        else:
+            score -= idx - pos
+        last = idx
+        pos = idx + 1
+
+    return score - len(name)
+
+
+class RankedNames:
+    """
+    This class describes the names of a listing matching a query.
+
+    Names starting with the query are ranked best, ordered by length, which
+    doesn't require to score them one by one. All `others` are scored lazily,
+    only if not enough names start with the query.
+    """
+
+    __slots__ = ["prefixed", "others", "scored"]
+
+    def __init__(self, prefixed: list[str], others: list[str], scored: bool = False):
+        self.prefixed = prefixed
+        self.others = others
+        self.scored = scored or not others
+
+
+class RankCache:
+    """
+    This class describes a LRU cache of directory names ranked by queries.
+
+    Each entry contains all names of a listing matching a query. As names
+    matching a query also match all its prefixes, a growing query only needs
+    to rank names matching the longest cached prefix, so typing a name narrows
+    candidates instead of scoring all names again.
+    """
+
+    def __init__(self, size: int = RANK_CACHE_SIZE):
+        self.size = size
+        self.entries: OrderedDict[tuple[frozenset[str], str], RankedNames] = OrderedDict()
+        self.lock = Lock()
+
+    def clear(self) -> None:
+        with self.lock:
+            self.entries.clear()
+
+    def rank(self, names: frozenset[str], query: str, limit: int = 0) -> tuple[list[str], bool]:
+        """
+        Return the `limit` best `names` fuzzy matching `query`.
+
+        :returns: A tuple of ranked names and a flag indicating whether matches were dropped.
+        """
+        query = query.lower()
+        entry = self.lookup(names, query)
+
+        if 0 < limit <= len(entry.prefixed):
+            return entry.prefixed[:limit], limit < len(entry.prefixed) + len(entry.others)
+
+        if not entry.scored:
+            scored = []
+            for name in entry.others:
+                score = fuzzy_score(query, name)
+                if score is not None:
+                    scored.append((-score, name))
+            scored.sort()
+            entry.others = [name for _, name in scored]
+            entry.scored = True
+
+        ranked = entry.prefixed + entry.others
+        if 0 < limit < len(ranked):
+            return ranked[:limit], True
+        return ranked, False
+
+    def lookup(self, names: frozenset[str], query: str) -> RankedNames:
+        """
+        Return cached or newly filtered names matching `query`.
+        """
+        parent = None
+        with self.lock:
+            for end in range(len(query), -1, -1):
+                parent = self.entries.get((names, query[:end]))
+                if parent is not None:
+                    self.entries.move_to_end((names, query[:end]))
+                    if end == len(query):
+                        return parent
+                    break
+
+        if not query:
+            # all names score equally
+            entry = RankedNames(sorted(names), [])
+
+        else:
+            # drop names not containing query characters in order at C speed
+            pattern = re.compile(".*?".join(map(re.escape, query)), re.IGNORECASE)
+            is_prefixed = re.compile(re.escape(query), re.IGNORECASE).match
+
+            if parent is None:
+                candidates = names
+                prefixed = None
+            elif end == 0:
+                # names of an empty query are ordered by name, only
+                candidates = parent.prefixed
+                prefixed = None
+            else:
+                # names starting with a longer query can only be found among,
+                # and are already ordered like, those starting with the shorter one
+                prefixed = list(filter(is_prefixed, parent.prefixed))
+                exclude = set(prefixed)
+                candidates = [n for n in parent.prefixed if n not in exclude] + parent.others
+
+            matches = list(filter(pattern.search, candidates))
+            if prefixed is None:
+                prefixed = list(filter(is_prefixed, matches))
+                # stable sort by name and then length, using C implemented keys only
+                prefixed.sort()
+                prefixed.sort(key=len)
+                exclude = set(prefixed)
+                others = [name for name in matches if name not in exclude]
+            else:
+                others = matches
+
+            entry = RankedNames(prefixed, others)
+
+        with self.lock:
+            self.entries[(names, query)] = entry
+            while len(self.entries) > self.size:
+                self.entries.popitem(last=False)
+
+        return entry
+
+
+rank_cache = RankCache()
+
+
+def rank_names(names: Iterable[str], query: str = "", limit: int = 0) -> tuple[list[str], bool]:
+    """
+    Return the `limit` best names fuzzy matching `query`.
+
+    :returns: A tuple of ranked names and a flag indicating whether matches were dropped.
+    """
+    if not isinstance(names, frozenset):
+        names = frozenset(names)
+    return rank_cache.rank(names, query, limit)
+
+
+def directory_completions(
+    names: Iterable[str], truncated: bool = False
+) -> list[sublime.CompletionValue]:
+    details = "Directory listing is incomplete." if truncated else ""
+    return [
+        location_completion(
+            trigger=name,
+            type=LocationCompletionType.PATH,
+            kind=(sublime.KindId.NAMESPACE, "d", "directory"),
+            details=details,
+        )
+        for name in names
+    ]
+
+
+def directory_completion_list(
+    completions: list[sublime.CompletionValue],
+    listing: DirectoryListing,
+    query: str,
+    limit: int,
+    flags: sublime.AutoCompleteFlags,
+) -> tuple[list[sublime.CompletionValue], sublime.AutoCompleteFlags]:
+    """
+    Append completions of the best matching directory names to `completions`.
+
+    ST is asked to query completions again on next keystroke,
+    if matching names were dropped or the listing is incomplete,
+    as they might match better or be complete then.
+    """
+    ranked, dropped = rank_names(listing.names, query, limit)
+    if dropped or listing.truncated:
+        flags |= sublime.AutoCompleteFlags.DYNAMIC_COMPLETIONS
+    return completions + directory_completions(ranked, listing.truncated), flags
+
+
+def path_query(path_string: str | None) -> str:
+    """
+    Return the incomplete directory name at the end of a path.
+    """
+    if not path_string:
+        return ""
+    return path_string.replace("\\", "/").rsplit("/", 1)[-1]
+
+
+class PendingCompletions:
+    """
+    This class describes completions, which are completed by background scans.
+
+    The `completion_list` is returned to ST immediately. It is filled as soon
+    as all scans are finished or `timeout` milliseconds elapsed, whatever
+    happens first. Results of scans, which didn't finish in time, are dropped.
+    """
+
+    def __init__(
+        self,
+        completions: list[sublime.CompletionValue],
+        futures: list[Future],
+        flags: sublime.AutoCompleteFlags,
+        timeout: int,
+        query: str = "",
+        limit: int = 0,
+    ):
+        self.completion_list = sublime.CompletionList()
+        self.completions = completions
+        self.futures = futures
+        self.flags = flags
+        self.query = query
+        self.limit = limit
+        self.finished = False
+        self.lock = Lock()
+
+        sublime.set_timeout_async(self.finish, timeout)
+        for future in futures:
+            future.add_done_callback(self.on_scanned)
+
+    def on_scanned(self, _: Future) -> None:
+        if all(future.done() for future in self.futures):
+            self.finish()
+
+    def finish(self) -> None:
+        with self.lock:
+            if self.finished:
+                return
+            self.finished = True
+
+        self.completion_list.set_completions(
+            *directory_completion_list(
+                self.completions,
+                scan_results(self.futures),
+                self.query,
+                self.limit,
+                self.flags,
+            )
+        )
+
+
+def scan_results(futures: list[Future]) -> DirectoryListing:
+    """
+    Return deduplicated folder names of all successfully finished scans.
+
+    The result is marked truncated, if any scan is still pending.
+    """
+    if len(futures) == 1 and futures[0].done() and not futures[0].cancelled():
+        # return cached listing as is, so its ranked names are reused
+        if futures[0].exception() is None:
+            return futures[0].result()
+
+    names = set()
+    truncated = False
+    for future in futures:
+        if not future.done():
+            truncated = True
+        elif not future.cancelled() and future.exception() is None:
+            listing = future.result()
+            names |= listing.names
+            truncated |= listing.truncated
+    return DirectoryListing(frozenset(names), truncated)
+
+
 class FindInFilesLocationCompletionListener(sublime_plugin.EventListener):
     # globally suggested everywhere
     operator_completions: list[sublime.CompletionValue] = [
@@ -116,7 +532,8 @@ class FindInFilesLocationCompletionListener(sublime_plugin.EventListener):
         if view.element() != "find_in_files:input:location":
             # not within find in files "Where:" input
             return None
-        if view.settings().get("auto_complete_disabled"):
+        settings = view.settings()
+        if settings.get("auto_complete_disabled"):
             # auto completions are disabled by configuration
             return None
         if not view.match_selector(0, "source.file-pattern"):
@@ -127,11 +544,6 @@ class FindInFilesLocationCompletionListener(sublime_plugin.EventListener):
 
         completions = self.operator_completions.copy()
 
-        try:
-            completions += self.path_completions(view, prefix, pt)
-        except OSError:
-            pass
-
         if view.match_selector(max(0, pt - 1), "- meta.path"):
             completions += self.file_completions(view, prefix, pt)
             completions += self.variable_completions
@@ -152,30 +564,82 @@ class FindInFilesLocationCompletionListener(sublime_plugin.EventListener):
                             )
                         )
 
-        return sublime.CompletionList(
-            completions, sublime.AutoCompleteFlags.INHIBIT_WORD_COMPLETIONS
-        )
+        flags = sublime.AutoCompleteFlags.INHIBIT_WORD_COMPLETIONS
+
+        # directory names are pre-filtered by the part of path in front of caret
+        # and limited to the best matches to keep huge directories fast.
+        path_string = self.path_string(view, pt)
+        query = path_query(path_string)
+        limit = settings.get("location_completions_max_items", 500)
+
+        names = self.indexed_folders(view, path_string)
+        if names is not None:
+            return sublime.CompletionList(
+                *directory_completion_list(
+                    completions, DirectoryListing(frozenset(names)), query, limit, flags
+                )
+            )
+
+        folders = self.path_folders(view, prefix, pt)
+        if folders is None:
+            completions += self.drive_completions()
+
+        elif folders:
+            if not settings.get("location_completions_async", True):
+                return sublime.CompletionList(
+                    *directory_completion_list(
+                        completions, self.folder_listing(folders), query, limit, flags
+                    )
+                )
+
+            # scan folders in background and wait a moment to return
+            # cached or quickly scanned folders synchronously
+            futures = [directory_scanner.submit(folder) for folder in folders]
+            _, not_done = wait(futures, timeout=0.02)
+            if not_done:
+                timeout = settings.get("location_completions_timeout", 1000)
+                return PendingCompletions(
+                    completions, futures, flags, timeout, query, limit
+                ).completion_list
+
+            return sublime.CompletionList(
+                *directory_completion_list(
+                    completions, scan_results(futures), query, limit, flags
+                )
+            )
+
+        return sublime.CompletionList(completions, flags)
 
     def file_completions(
         self, view: sublime.View, prefix: str, pt: sublime.Point
     ) -> list[sublime.CompletionValue]:
         completions = []
 
-        # collect file extensions
         window = view.window()
         if window:
-            extensions = {"*"}
-            for view in window.views():
-                fname = view.file_name()
-                if fname:
-                    _, ext = fname.rsplit(".", 1)
-                    if ext:
-                        extensions.add(ext)
-
-            for ext in extensions:
+            limit = view.settings().get("location_completions_max_extensions", 50)
+            index = project_index(window)
+            if index:
+                # file extensions of project folders, ranked by frequency
+                extensions = index.file_extensions(limit)
+            else:
+                # collect file extensions of open files
+                counter = Counter()
+                for other in window.views():
+                    fname = other.file_name()
+                    if fname:
+                        ext = file_extension(fname)
+                        if ext:
+                            counter[ext] += 1
+                extensions = counter.most_common(limit)
+
+            extensions.insert(0, ("*", 0))
+
+            for ext, count in extensions:
                 completions.append(
                     location_completion(
                         trigger=f"*.{ext}",
+                        annotation=f"{count} files" if count else "",
                         type=LocationCompletionType.FILE,
                         kind=(sublime.KindId.TYPE, "e", "extension"),
                         details=f"include <em>{ext}</em> files.",
@@ -184,49 +648,86 @@ class FindInFilesLocationCompletionListener(sublime_plugin.EventListener):
 
         return completions
 
-    def path_completions(
-        self, view: sublime.View, prefix: str, pt: sublime.Point
-    ) -> list[sublime.CompletionValue]:
+    def path_string(self, view: sublime.View, pt: sublime.Point) -> str | None:
+        """
+        Return the path in front of the caret.
+        """
         check_pt = max(0, pt - 1)
         selector = "meta.path - punctuation.definition"
         if view.match_selector(check_pt, selector):
             reg = view.expand_to_scope(check_pt, selector)
             if reg:
                 reg.b = pt
-                path_string = view.substr(reg)
-                if path_string.startswith("//"):
-                    window = view.window()
-                    if not window:
-                        return []
-
-                    project_folders = window.folders()
-                    if not project_folders:
-                        return []
-
-                    parts = path_string[2:].replace("\\", "/").rsplit("/", 1)
-                    if len(parts) < 2:
-                        folders = [Path(f) for f in project_folders]
-                    else:
-                        path_string = parts[0]
-
-                        folders = []
-                        for root in project_folders:
-                            folder = Path(root) / path_string
-                            if folder.is_dir():
-                                folders.append(folder)
+                return view.substr(reg)
+        return None
 
-                else:
-                    folder = Path(path_string.replace("\\", "/").rsplit("/", 1)[0] + "/")
-                    if not folder.is_absolute():
-                        # todo handle relative paths which can start everywhere
-                        # in the tree of project folders
-                        return []
+    def indexed_folders(
+        self, view: sublime.View, path_string: str | None
+    ) -> set[str] | frozenset[str] | None:
+        """
+        Return names of sub directories from project index.
+
+        :returns: ``None``, if the path can't be resolved by the index.
+        """
+        if not path_string:
+            return None
+
+        window = view.window()
+        if not window:
+            return None
+
+        if path_string.startswith("//"):
+            parts = path_string[2:].replace("\\", "/").rsplit("/", 1)
+            index = project_index(window)
+            if index:
+                return index.project_children(parts[0] if len(parts) > 1 else "")
+
+        elif not Path(path_string).is_absolute():
+            parts = path_string.replace("\\", "/").rsplit("/", 1)
+            index = project_index(window)
+            if index:
+                if len(parts) > 1:
+                    return index.relative_children(parts[0])
+                return index.relative_children("")
+
+        return None
+
+    def path_folders(
+        self, view: sublime.View, prefix: str, pt: sublime.Point
+    ) -> list[Path] | None:
+        """
+        Return list of folders to complete sub directories of.
+
+        :returns: ``None``, if drive letters are to be completed.
+        """
+        path_string = self.path_string(view, pt)
+        if path_string is None:
+            folders = [Path("/")]
 
-                    folders = [folder]
+        elif path_string.startswith("//"):
+            window = view.window()
+            if not window:
+                return []
+
+            project_folders = window.folders()
+            if not project_folders:
+                return []
+
+            parts = path_string[2:].replace("\\", "/").rsplit("/", 1)
+            if len(parts) < 2:
+                folders = [Path(f) for f in project_folders]
             else:
-                folders = [Path("/")]
+                path_string = parts[0]
+                # not existing folders are skipped by scanner
+                folders = [Path(root) / path_string for root in project_folders]
+
         else:
-            folders = [Path("/")]
+            folder = Path(path_string.replace("\\", "/").rsplit("/", 1)[0] + "/")
+            if not folder.is_absolute():
+                # relative paths are resolved by project index, only
+                return []
+
+            folders = [folder]
 
         if IS_WINDOWS and len(folders) == 1 and not folders[0].drive:
             # return drive letter only at beginning of file patterns
@@ -234,32 +735,35 @@ class FindInFilesLocationCompletionListener(sublime_plugin.EventListener):
             if reg and pt - reg.a > 1:
                 return []
 
-            # return a list of available drives on Windows OS
-            return [
-                location_completion(
-                    trigger=f"{drive}:",
-                    type=LocationCompletionType.PATH,
-                    kind=(sublime.KindId.NAMESPACE, "d", "drive"),
-                )
-                for drive in iterdrives()
-            ]
+            return None
 
-        else:
-            # deduplicate folder names
-            items = {
-                item.name
-                for folder in folders
-                for item in folder.iterdir()
-                if item.is_dir()
-            }
-            return [
-                location_completion(
-                    trigger=item,
-                    type=LocationCompletionType.PATH,
-                    kind=(sublime.KindId.NAMESPACE, "d", "directory"),
-                )
-                for item in items
-            ]
+        return folders
+
+    def drive_completions(self) -> list[sublime.CompletionValue]:
+        # return a list of available drives on Windows OS
+        return [
+            location_completion(
+                trigger=f"{drive}:",
+                type=LocationCompletionType.PATH,
+                kind=(sublime.KindId.NAMESPACE, "d", "drive"),
+            )
+            for drive in iterdrives()
+        ]
+
+    def folder_listing(self, folders: list[Path]) -> DirectoryListing:
+        # deduplicate folder names
+        items = set()
+        truncated = False
+        for folder in folders:
+            try:
+                listing = directory_cache.listdir(folder)
+            except OSError:
+                pass
+            else:
+                items |= listing.names
+                truncated |= listing.truncated
+
+        return DirectoryListing(frozenset(items), truncated)
 
 
 class FindInFilesCommitLocationCompletionCommand(sublime_plugin.TextCommand):
@@ -325,3 +829,216 @@ class FindInFilesCommitLocationCompletionCommand(sublime_plugin.TextCommand):
 
         # insert new variable
         self.view.insert(edit, pt, completion)
+
+
+# maximum number of files to count, before counting is stopped
+MATCH_COUNT_LIMIT = 100000
+# maximum time in seconds to spend on counting files
+MATCH_COUNT_TIMEOUT = 5.0
+# maximum age of cached file counts in seconds
+MATCH_COUNT_TTL = 60.0
+# maximum number of cached file counts
+MATCH_COUNT_CACHE_SIZE = 64
+
+
+class LocationFilter:
+    """
+    This class describes the parsed patterns of Find in Files "Where:" field.
+
+    It approximates ST's rules to decide which files are searched:
+
+    - ``-pattern`` excludes files or folders matching `pattern`
+    - ``//path`` includes a folder relative to project folders
+    - ``/path`` includes an absolute folder or file
+    - ``*.ext`` includes files matching a pattern
+    - ``*/name/`` includes folders matching a pattern
+    - ``<open folders>`` includes all project folders
+    - ``<project filters>`` applies project specific exclude patterns
+    """
+
+    def __init__(
+        self,
+        patterns: list[str],
+        project_folders: list[str],
+        folder_exclude_patterns: list[str] = [],
+        file_exclude_patterns: list[str] = [],
+    ):
+        self.folders: list[str] = []
+        self.files: list[str] = []
+        self.folder_includes: list[str] = []
+        self.file_includes: list[str] = []
+        self.folder_excludes: list[str] = []
+        self.file_excludes: list[str] = []
+
+        for pattern in patterns:
+            exclude = pattern.startswith("-")
+            if exclude:
+                pattern = pattern[1:].strip()
+
+            if pattern == "<open folders>":
+                self.folders += project_folders
+
+            elif pattern == "<project filters>":
+                self.folder_excludes += folder_exclude_patterns
+                self.file_excludes += file_exclude_patterns
+
+            elif pattern.startswith("<"):
+                # <current file>, <open files>, ... are not counted
+                continue
+
+            elif pattern.startswith("//"):
+                self.folders += [os.path.join(root, pattern[2:]) for root in project_folders]
+
+            elif os.path.isabs(pattern) and not exclude:
+                if os.path.isfile(pattern):
+                    self.files.append(pattern)
+                else:
+                    self.folders.append(pattern)
+
+            elif pattern.endswith(("/", "\\")):
+                name = pattern.rstrip("/\\").rsplit("/", 1)[-1].rsplit("\\", 1)[-1]
+                if exclude:
+                    self.folder_excludes.append(name)
+                else:
+                    self.folder_includes.append(name)
+
+            elif exclude:
+                self.file_excludes.append(pattern)
+            else:
+                self.file_includes.append(pattern)
+
+        if not self.folders and not self.files:
+            self.folders = project_folders
+
+    def key(self) -> tuple:
+        return (
+            tuple(self.folders),
+            tuple(self.files),
+            tuple(self.folder_includes),
+            tuple(self.file_includes),
+            tuple(self.folder_excludes),
+            tuple(self.file_excludes),
+        )
+
+    def count(self, is_cancelled: Callable[[], bool]) -> tuple[int, bool]:
+        """
+        Count files matching patterns.
+
+        Counting stops after `MATCH_COUNT_LIMIT` files or `MATCH_COUNT_TIMEOUT`
+        seconds, whatever happens first.
+
+        :returns: A tuple of number of files and a flag indicating the number to be exact.
+        """
+        deadline = monotonic() + MATCH_COUNT_TIMEOUT
+        count = len(self.files)
+        # stack of folders and whether they are already included by folder patterns
+        stack = [(folder, not self.folder_includes) for folder in self.folders]
+        while stack:
+            if count >= MATCH_COUNT_LIMIT or monotonic() > deadline or is_cancelled():
+                return count, False
+
+            folder, included = stack.pop()
+            try:
+                for entry, is_dir in BoundedScandir(folder, follow_symlinks=False):
+                    name = entry.name
+                    if is_dir:
+                        if not matches_any(name, self.folder_excludes):
+                            stack.append(
+                                (entry.path, included or matches_any(name, self.folder_includes))
+                            )
+                    elif (
+                        included
+                        and (not self.file_includes or matches_any(name, self.file_includes))
+                        and not matches_any(name, self.file_excludes)
+                    ):
+                        count += 1
+            except OSError:
+                pass
+
+        return count, True
+
+
+def matches_any(name: str, patterns: list[str]) -> bool:
+    return any(fnmatch(name, pattern) for pattern in patterns)
+
+
+class LocationMatchCounter:
+    """
+    This class describes a background counter of files matching "Where:" patterns.
+
+    Only one count runs at a time. Starting a new one cancels the pending one.
+    Results are cached per set of patterns.
+    """
+
+    def __init__(self):
+        self.cache: OrderedDict[tuple, tuple[float, int, bool]] = OrderedDict()
+        self.generation = 0
+        self.lock = Lock()
+
+    def count(self, location: LocationFilter, on_done: Callable[[int, bool], None]) -> None:
+        key = location.key()
+        with self.lock:
+            self.generation += 1
+            generation = self.generation
+            entry = self.cache.get(key)
+            if entry and monotonic() - entry[0] < MATCH_COUNT_TTL:
+                self.cache.move_to_end(key)
+                on_done(entry[1], entry[2])
+                return
+
+        def is_cancelled():
+            return self.generation != generation
+
+        def run():
+            count, exact = location.count(is_cancelled)
+            if is_cancelled():
+                return
+            with self.lock:
+                self.cache[key] = (monotonic(), count, exact)
+                while len(self.cache) > MATCH_COUNT_CACHE_SIZE:
+                    self.cache.popitem(last=False)
+            on_done(count, exact)
+
+        Thread(target=run, name="location_match_count", daemon=True).start()
+
+
+location_match_counter = LocationMatchCounter()
+
+
+class FindInFilesLocationMatchCountListener(sublime_plugin.EventListener):
+    """
+    This class displays approximate number of files matching "Where:" patterns.
+
+    The number is displayed in status bar, while typing.
+    """
+
+    def on_modified_async(self, view: sublime.View):
+        if view.element() != "find_in_files:input:location":
+            return
+        if not view.settings().get("location_match_count", True):
+            return
+        self.count_matches(view)
+
+    @debounced(500)
+    def count_matches(self, view: sublime.View):
+        window = view.window() or sublime.active_window()
+        if not window:
+            return
+
+        text = view.substr(sublime.Region(0, view.size()))
+        patterns = [pattern.strip() for pattern in text.split(",") if pattern.strip()]
+
+        active_view = window.active_view()
+        settings = active_view.settings() if active_view else view.settings()
+        location = LocationFilter(
+            patterns,
+            window.folders(),
+            settings.get("folder_exclude_patterns", []),
+            settings.get("file_exclude_patterns", []),
+        )
+
+        def on_done(count: int, exact: bool) -> None:
+            approx = "" if exact else "≥ "
+            window.status_message(f"Where: {approx}{count} files")
+
+        location_match_counter.count(location, on_done)
@@ -0,0 +1,417 @@
+"""
+Background index of project folders
+
+Provides a prefix trie of all directories within a window's project folders,
+which is used to complete relative paths in Find in Files "Where:" field
+without walking the filesystem for each query.
+
+It also maintains a histogram of file extensions per project folder.
+"""
+from __future__ import annotations
+from collections import Counter, deque
+from fnmatch import fnmatch
+from threading import Lock, Thread
+from time import monotonic
+from typing import Iterator
+import os
+
+import sublime
+import sublime_plugin
+
+__all__ = ["ProjectIndexListener"]
+
+# maximum number of directories to index per window
+PROJECT_INDEX_MAX_DIRS = 200000
+# maximum age of an index in seconds, before it is rebuilt on next request
+PROJECT_INDEX_TTL = 300.0
+# maximum number of entries to enumerate per directory
+SCAN_MAX_ENTRIES = 50000
+# maximum time in seconds to spend on enumerating a single directory
+SCAN_TIMEOUT = 2.0
+
+
+class BoundedScandir:
+    """
+    This class describes a bounded iterator over directory entries.
+
+    It yields tuples of ``os.DirEntry`` and a flag indicating the entry to be
+    a directory. Enumeration stops after `max_entries` entries or `timeout`
+    seconds, in which case `truncated` is set. Unreadable entries, like
+    broken or looping symbolic links, are skipped silently.
+
+    :raises OSError: if the directory itself can't be opened.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        max_entries: int = SCAN_MAX_ENTRIES,
+        timeout: float = SCAN_TIMEOUT,
+        follow_symlinks: bool = True,
+    ):
+        self.path = path
+        self.max_entries = max_entries
+        self.timeout = timeout
+        self.follow_symlinks = follow_symlinks
+        self.truncated = False
+
+    def __iter__(self) -> Iterator[tuple[os.DirEntry, bool]]:
+        deadline = monotonic() + self.timeout
+        with os.scandir(self.path) as it:
+            count = 0
+            while True:
+                try:
+                    entry = next(it)
+                except StopIteration:
+                    return
+                except OSError:
+                    # directory became unreadable while enumerating it
+                    self.truncated = True
+                    return
+
+                count += 1
+                if count > self.max_entries or monotonic() > deadline:
+                    self.truncated = True
+                    return
+
+                try:
+                    is_dir = entry.is_dir(follow_symlinks=self.follow_symlinks)
+                except OSError:
+                    continue
+
+                yield entry, is_dir
+
+
+class PathNode:
+    """
+    This class describes a directory within the trie of a `ProjectIndex`.
+    """
+
+    __slots__ = ["name", "parent", "children", "scanned"]
+
+    def __init__(self, name: str, parent: PathNode | None = None):
+        self.name = name
+        self.parent = parent
+        self.children: dict[str, PathNode] = {}
+        self.scanned = False
+
+    def path(self) -> str:
+        parts = []
+        node = self
+        while node.parent:
+            parts.append(node.name)
+            node = node.parent
+        parts.append(node.name)
+        return os.path.join(*reversed(parts))
+
+
+class ProjectIndex:
+    """
+    This class describes a prefix trie of all directories of project folders.
+
+    The trie is built incrementally in a background thread, breadth first, so
+    top-level directories are available almost instantly. Each directory name
+    is additionally mapped to all its nodes, to be able to resolve relative
+    paths, which may start anywhere in the tree of project folders.
+
+    File extensions found while walking the tree are counted per project folder.
+
+    The set of all directory names is frozen lazily, once names changed, so
+    it is returned as the same object to completions, which cache their
+    fuzzy ranking per set of names.
+    """
+
+    def __init__(self, folders: list[str], exclude_patterns: list[str] = []):
+        self.folders = tuple(folders)
+        self.exclude_patterns = tuple(exclude_patterns)
+        self.roots = [PathNode(folder) for folder in self.folders]
+        self.names: dict[str, list[PathNode]] = {}
+        self.all_names: frozenset[str] = frozenset()
+        self.names_changed = False
+        self.extensions: dict[str, Counter[str]] = {folder: Counter() for folder in self.folders}
+        self.size = 0
+        self.created = monotonic()
+        # set, once building finished, even if it stopped at PROJECT_INDEX_MAX_DIRS
+        self.complete = False
+        self.cancelled = False
+        self.lock = Lock()
+        self.thread = Thread(target=self.build, name="project_index", daemon=True)
+
+    def start(self) -> None:
+        self.thread.start()
+
+    def cancel(self) -> None:
+        """
+        Stop building the index.
+        """
+        self.cancelled = True
+
+    def is_stale(self, folders: list[str]) -> bool:
+        return self.folders != tuple(folders) or monotonic() - self.created > PROJECT_INDEX_TTL
+
+    def is_excluded(self, name: str) -> bool:
+        return any(fnmatch(name, pattern) for pattern in self.exclude_patterns)
+
+    def build(self) -> None:
+        # real paths of project folders and followed symbolic links,
+        # to detect links pointing into already indexed trees
+        visited = {os.path.realpath(folder) for folder in self.folders}
+
+        queue = deque((root, self.extensions[root.name]) for root in self.roots)
+        while queue and self.size < PROJECT_INDEX_MAX_DIRS:
+            if self.cancelled:
+                return
+
+            node, extensions = queue.popleft()
+            names = []
+            links = set()
+            counts = Counter()
+            try:
+                for entry, is_dir in BoundedScandir(node.path()):
+                    if is_dir:
+                        if not self.is_excluded(entry.name):
+                            names.append(entry.name)
+                            if entry.is_symlink():
+                                real_path = os.path.realpath(entry.path)
+                                if any(is_subpath(real_path, path) for path in visited):
+                                    links.add(entry.name)
+                                else:
+                                    visited.add(real_path)
+                    else:
+                        ext = file_extension(entry.name)
+                        if ext:
+                            counts[ext] += 1
+            except OSError:
+                pass
+
+            with self.lock:
+                extensions.update(counts)
+                for name in names:
+                    child = PathNode(name, node)
+                    node.children[name] = child
+                    self.add_name(child)
+                    # don't descend into links to prevent cycles and duplicates
+                    if name not in links:
+                        queue.append((child, extensions))
+                node.scanned = True
+                self.size += len(names)
+
+        self.complete = True
+
+    def add_name(self, node: PathNode) -> None:
+        nodes = self.names.get(node.name)
+        if nodes is None:
+            nodes = self.names[node.name] = []
+            self.names_changed = True
+        nodes.append(node)
+
+    def add_path(self, path: str) -> None:
+        """
+        Add a directory, created after the index was built.
+        """
+        for root in self.roots:
+            if not is_subpath(path, root.name):
+                continue
+
+            relpath = os.path.relpath(path, root.name)
+            with self.lock:
+                node = root
+                for name in relpath.replace("\\", "/").split("/"):
+                    if not node.scanned or name in (os.curdir, ""):
+                        break
+                    child = node.children.get(name)
+                    if child is None:
+                        child = PathNode(name, node)
+                        child.scanned = True
+                        node.children[name] = child
+                        self.add_name(child)
+                        self.size += 1
+                    node = child
+            return
+
+    def update_extension(self, path: str, delta: int) -> None:
+        """
+        Update file extension histogram for a created or deleted file.
+        """
+        ext = file_extension(path)
+        if not ext:
+            return
+
+        for folder, extensions in self.extensions.items():
+            if is_subpath(path, folder):
+                with self.lock:
+                    extensions[ext] += delta
+                    if extensions[ext] <= 0:
+                        del extensions[ext]
+                return
+
+    def file_extensions(self, limit: int | None = None) -> list[tuple[str, int]]:
+        """
+        Return file extensions of all project folders, ranked by frequency.
+        """
+        total = Counter()
+        with self.lock:
+            for extensions in self.extensions.values():
+                total.update(extensions)
+        return total.most_common(limit)
+
+    def children(self, nodes: list[PathNode], parts: list[str]) -> set[str] | None:
+        """
+        Return names of sub directories of all `nodes` joined with `parts`.
+
+        :returns: ``None``, if any of the directories is not yet indexed.
+        """
+        with self.lock:
+            for part in parts:
+                if not part or part == os.curdir:
+                    continue
+                if not all(node.scanned for node in nodes):
+                    return None
+                nodes = [node.children[part] for node in nodes if part in node.children]
+
+            if not all(node.scanned for node in nodes):
+                return None
+
+            return {name for node in nodes for name in node.children}
+
+    def project_children(self, path: str) -> set[str] | None:
+        """
+        Return names of sub directories of a path relative to project folders.
+
+        :param path: The path relative to project folders without leading ``//``.
+        """
+        return self.children(self.roots, path.replace("\\", "/").split("/"))
+
+    def relative_children(self, path: str) -> set[str] | frozenset[str]:
+        """
+        Return names of sub directories of a path, which may start anywhere.
+
+        :param path: The relative path, like ``src/pkg``.
+                     All directory names are returned, if empty,
+                     to be filtered and ranked by completions.
+        """
+        parts = [part for part in path.replace("\\", "/").split("/") if part]
+        with self.lock:
+            if not parts:
+                if self.names_changed:
+                    self.all_names = frozenset(self.names)
+                    self.names_changed = False
+                return self.all_names
+
+            nodes = self.names.get(parts[0], [])
+            for part in parts[1:]:
+                nodes = [node.children[part] for node in nodes if part in node.children]
+
+            return {name for node in nodes for name in node.children}
+
+
+def file_extension(name: str) -> str:
+    """
+    Return extension of a file name without leading dot.
+    """
+    return os.path.splitext(name)[1][1:]
+
+
+def is_subpath(path: str, folder: str) -> bool:
+    try:
+        return not os.path.relpath(path, folder).startswith(os.pardir)
+    except ValueError:
+        # path and folder are located on different drives
+        return False
+
+
+# indexes served to queries per window
+project_indexes: dict[int, ProjectIndex] = {}
+# indexes being rebuilt in background per window, to replace outdated ones
+pending_indexes: dict[int, ProjectIndex] = {}
+
+
+def create_index(folders: list[str]) -> ProjectIndex:
+    settings = sublime.load_settings("Preferences.sublime-settings")
+    index = ProjectIndex(folders, settings.get("folder_exclude_patterns", []))
+    index.start()
+    return index
+
+
+def discard_indexes(window_id: int) -> None:
+    for indexes in (project_indexes, pending_indexes):
+        index = indexes.pop(window_id, None)
+        if index:
+            index.cancel()
+
+
+def project_index(window: sublime.Window) -> ProjectIndex | None:
+    """
+    Return the index of a window's project folders.
+
+    A new index is created and built in background, if folders changed or
+    the existing one is outdated. An outdated index of unchanged folders
+    is still returned, until its replacement is complete.
+    """
+    folders = window.folders()
+    if not folders:
+        discard_indexes(window.id())
+        return None
+
+    window_id = window.id()
+    index = project_indexes.get(window_id)
+    if index is None or index.folders != tuple(folders):
+        discard_indexes(window_id)
+        index = project_indexes[window_id] = create_index(folders)
+
+    elif index.is_stale(folders):
+        pending = pending_indexes.get(window_id)
+        if pending is None:
+            pending_indexes[window_id] = create_index(folders)
+        elif pending.complete:
+            index.cancel()
+            index = project_indexes[window_id] = pending_indexes.pop(window_id)
+
+    return index
+
+
+def window_indexes(window: sublime.Window) -> list[ProjectIndex]:
+    """
+    Return served and pending indexes of a window.
+    """
+    return [
+        index
+        for index in (project_indexes.get(window.id()), pending_indexes.get(window.id()))
+        if index
+    ]
+
+
+class ProjectIndexListener(sublime_plugin.EventListener):
+    """
+    This class keeps project indexes up to date with files created
+    or deleted by ST.
+    """
+
+    new_files: set[int] = set()
+
+    def on_pre_save(self, view: sublime.View):
+        file_name = view.file_name()
+        if file_name and not os.path.exists(file_name):
+            self.new_files.add(view.id())
+
+    def on_post_save_async(self, view: sublime.View):
+        is_new_file = view.id() in self.new_files
+        self.new_files.discard(view.id())
+
+        window = view.window()
+        file_name = view.file_name()
+        if window and file_name:
+            for index in window_indexes(window):
+                # folders may have been created to save the file
+                index.add_path(os.path.dirname(file_name))
+                if is_new_file:
+                    index.update_extension(file_name, 1)
+
+    def on_window_command(self, window: sublime.Window, command_name: str, args: dict | None):
+        if command_name == "delete_file" and args:
+            for index in window_indexes(window):
+                for file_name in args.get("files", []):
+                    index.update_extension(file_name, -1)
+
+    def on_pre_close_window(self, window: sublime.Window):
+        discard_indexes(window.id())
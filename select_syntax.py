@@ -52,7 +52,7 @@ class SyntaxInputHandler(sublime_plugin.ListInputHandler):
             self.preview_syntax(text)
         return sublime.Html(f"<strong>Syntax Path:</strong> <small>{text}</small>")
 
-    @debounced(100, sync=True)
+    @debounced(100, sync=True, key=lambda self, syntax: self.view, per_instance=True)
     def preview_syntax(self, syntax: str) -> None:
         if self.view:
             self.view.assign_syntax(syntax)